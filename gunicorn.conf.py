@@ -0,0 +1,147 @@
+"""
+Gunicorn settings for the web pods, read automatically from the working
+directory, so the container just runs ``gunicorn``.
+
+Workers are sized from the container's CPU quota (cgroup v2 or v1), not the
+node's core count, which is what ``os.cpu_count()`` reports inside a pod:
+
+    gthread   2 x CPUs + 1 workers (at least 2), GUNICORN_THREADS threads each
+    uvicorn   one event loop per CPU (at least 1), serving the ASGI app
+
+Environment overrides: GUNICORN_WORKER_CLASS (gthread or uvicorn),
+GUNICORN_WORKERS (or WEB_CONCURRENCY), GUNICORN_THREADS, GUNICORN_PRELOAD,
+GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER, GUNICORN_KEEPALIVE,
+GUNICORN_TIMEOUT and PORT. Pair the uvicorn workers with
+ASYNC_READ_VIEWS=true.
+
+Migrations are not run here; they run once per release as a separate step
+(``kubernetes/migrate-job.yaml``).
+"""
+
+import math
+import os
+import shutil
+
+WORKER_CLASSES = {
+    "gthread": ("gthread", "voting_project.wsgi:application"),
+    "uvicorn": ("uvicorn.workers.UvicornWorker", "voting_project.asgi:application"),
+}
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def cpu_limit():
+    """CPUs this container may use: its cgroup quota, else the visible cores."""
+    try:
+        # cgroup v2: "<quota> <period>", or "max <period>" when unlimited
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                return quota / period
+        except (OSError, ValueError):
+            pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+cpus = cpu_limit()
+kind = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+if kind not in WORKER_CLASSES:
+    raise RuntimeError(
+        f"GUNICORN_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, "
+        f"not {kind!r}."
+    )
+worker_class, wsgi_app = WORKER_CLASSES[kind]
+
+if kind == "uvicorn":
+    default_workers = max(1, math.ceil(cpus))
+else:
+    default_workers = max(2, math.ceil(cpus * 2) + 1)
+workers = env_int("GUNICORN_WORKERS", env_int("WEB_CONCURRENCY", default_workers))
+threads = env_int("GUNICORN_THREADS", 4) if kind == "gthread" else 1
+
+# Django settings size the per-process database pool from these
+os.environ["GUNICORN_WORKER_CLASS"] = kind
+os.environ["GUNICORN_WORKERS"] = str(workers)
+os.environ["GUNICORN_THREADS"] = str(threads)
+
+bind = f"0.0.0.0:{env_int('PORT', 8000)}"
+
+# Import the app, and warm its templates, once in the master; workers share
+# those pages copy-on-write instead of each building their own
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+# Recycle workers to cap slow leaks; the jitter keeps them from all
+# restarting at once
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = timeout
+
+# Heartbeat files on tmpfs, not the container's overlay filesystem
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+errorlog = "-"
+
+# Each worker keeps its own metrics; with several, /metrics merges them from
+# files in this directory, whichever worker answers the scrape
+if workers > 1:
+    os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(worker_tmp_dir or "/tmp", "metrics")
+    )
+metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if metrics_dir:
+    # Created before the app is imported; counters from a previous run would
+    # otherwise be added to this one's
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def on_starting(server):
+    server.log.info(
+        "CPU limit %.2f: %d %s worker(s) x %d thread(s), preload=%s, "
+        "max_requests=%d+-%d",
+        cpus,
+        workers,
+        kind,
+        threads,
+        preload_app,
+        max_requests,
+        max_requests_jitter,
+    )
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Never share a database connection opened in the master with a worker
+        from django.db import connections
+
+        connections.close_all()
+
+
+def child_exit(server, worker):
+    if metrics_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
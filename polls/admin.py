@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Poll, Choice, Vote
+from .models import Category, Poll, PollSummary, Choice, Vote
 
 
 class ChoiceInline(admin.TabularInline):
@@ -25,7 +25,13 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
     list_display = ("poll", "choice", "user", "voted_at")
-    list_filter = ("voted_at",)
+    list_filter = ("archived", "voted_at")
+
+
+@admin.register(PollSummary)
+class PollSummaryAdmin(admin.ModelAdmin):
+    list_display = ("poll", "total_votes", "frozen_at", "votes_archived_at")
+    readonly_fields = [field.name for field in PollSummary._meta.fields]
 
 
 admin.site.register(Choice)
@@ -0,0 +1,145 @@
+from django.db.models import Prefetch, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from rest_framework import generics, status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
+from .lifecycle import closed_results
+from .models import Choice, Poll
+from .pagination import KeysetPagination
+from .results_cache import get_content_version, get_results, get_version
+from .serializers import (
+    PollDetailSerializer,
+    PollListSerializer,
+    PollResultsSerializer,
+    VoteSerializer,
+)
+from .tallies import compute_results
+from .voting import VoteRejected, cast_vote
+
+LIST_FIELDS = (
+    "id",
+    "slug",
+    "title",
+    "description",
+    "created_at",
+    "end_date",
+    "category__name",
+    "creator__username",
+)
+REJECTED_STATUS = {
+    VoteRejected.NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    VoteRejected.NOT_OPEN: status.HTTP_409_CONFLICT,
+    VoteRejected.INACTIVE: status.HTTP_409_CONFLICT,
+    VoteRejected.ENDED: status.HTTP_409_CONFLICT,
+    VoteRejected.LOGIN_REQUIRED: status.HTTP_403_FORBIDDEN,
+    VoteRejected.DUPLICATE: status.HTTP_409_CONFLICT,
+}
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 when the client's ETag matches the poll's version.
+    By default that is the results version, bumped on any change to the poll,
+    its choices or its votes, so the check costs one cache read and no
+    serialization. Views whose body has no vote counts override
+    ``etag_version``.
+    """
+
+    def etag_version(self, poll):
+        return get_version(poll.pk)
+
+    def conditional_response(self, request, poll, build):
+        etag = f'"{poll.slug}-{self.etag_version(poll)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = build()
+        response["ETag"] = etag
+        return response
+
+
+class PollListAPIView(generics.ListAPIView):
+    serializer_class = PollListSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Poll.objects.listed().with_counts().only(*LIST_FIELDS)
+
+
+class PollDetailAPIView(ConditionalGetMixin, generics.RetrieveAPIView):
+    serializer_class = PollDetailSerializer
+    lookup_field = "slug"
+
+    def get_queryset(self):
+        return Poll.objects.select_related("category", "creator").only(
+            *LIST_FIELDS,
+            "start_date",
+            "is_active",
+            "is_public",
+            "allow_multiple_votes",
+        )
+
+    def etag_version(self, poll):
+        # No counts in the body: votes must not invalidate the client's copy
+        return get_content_version(poll.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        poll = self.get_object()
+
+        def build():
+            # Choices are only fetched when the client's copy is stale
+            choices = Choice.objects.only("id", "poll_id", "choice_text", "order")
+            prefetch_related_objects([poll], Prefetch("choices", queryset=choices))
+            return Response(self.get_serializer(poll).data)
+
+        return self.conditional_response(request, poll, build)
+
+
+class PollResultsAPIView(ConditionalGetMixin, generics.GenericAPIView):
+    serializer_class = PollResultsSerializer
+
+    def get(self, request, slug):
+        poll = get_object_or_404(
+            Poll.objects.select_related("results_snapshot").only(
+                "id", "slug", "is_active", "closed_at", "results_snapshot"
+            ),
+            slug=slug,
+        )
+
+        def build():
+            results = closed_results(poll) or get_results(poll, compute_results)
+            return Response({"poll": poll.slug, **results})
+
+        return self.conditional_response(request, poll, build)
+
+
+class VoteAPIView(generics.GenericAPIView):
+    serializer_class = VoteSerializer
+    # Anonymous votes are allowed on public polls, as in the HTML view
+    permission_classes = [AllowAny]
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, ScopedRateThrottle]
+    throttle_scope = "votes"
+
+    def post(self, request, slug):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user if request.user.is_authenticated else None
+        try:
+            choice_text = cast_vote(
+                slug,
+                serializer.validated_data["choice"],
+                user=user,
+                ip_address=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT"),
+            )
+        except VoteRejected as e:
+            return Response(
+                {"detail": e.message, "code": e.reason},
+                status=REJECTED_STATUS[e.reason],
+            )
+        return Response(
+            {"detail": f"Vote recorded for '{choice_text}'!"},
+            status=status.HTTP_201_CREATED,
+        )
@@ -0,0 +1,15 @@
+from django.urls import path
+from . import api
+
+app_name = "api"
+
+urlpatterns = [
+    path("polls/", api.PollListAPIView.as_view(), name="poll_list"),
+    path("polls/<slug:slug>/", api.PollDetailAPIView.as_view(), name="poll_detail"),
+    path("polls/<slug:slug>/vote/", api.VoteAPIView.as_view(), name="poll_vote"),
+    path(
+        "polls/<slug:slug>/results/",
+        api.PollResultsAPIView.as_view(),
+        name="poll_results",
+    ),
+]
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class PollsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "polls"
+
+    def ready(self):
+        from django.conf import settings
+        from prometheus_client import REGISTRY
+        from . import reach, signals  # noqa: F401
+
+        if settings.REACH_ANALYTICS:
+            # Single-process metrics; see voting_project.urls.metrics otherwise
+            REGISTRY.register(reach.CategoryReachCollector())
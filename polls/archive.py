@@ -0,0 +1,204 @@
+"""
+Archival of polls marked ``is_archived``.
+
+``archive_poll`` freezes the poll's final tallies into a ``PollSummary`` row,
+then moves its votes out of the live set in batches by setting
+``Vote.archived``. On PostgreSQL the vote table is partitioned on that flag
+(migration 0007)::
+
+    polls_vote                          LIST (archived)
+      polls_vote_live                   false: primary key, unique indexes
+      polls_vote_archive                true, RANGE (voted_at)
+        polls_vote_archive_y2026m01     one per month, created as needed
+
+so the indexes every vote insert maintains, and autovacuum's work, stay
+sized to the polls still taking votes. ``detach_archive_partitions`` turns
+old months into standalone tables that can be dumped and dropped; the
+summaries, and the choice counters rebuilt at freeze time, still hold their
+polls' tallies.
+
+Unarchiving a poll moves its votes back (``restore_poll``), unless some of
+them were in a detached month.
+"""
+
+import logging
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from .models import Poll, PollSummary, Vote
+from .results_cache import invalidate_poll
+from .tallies import rebuild_vote_counts
+from . import write_behind
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = "polls_vote_archive"
+MONTH_PARTITION = re.compile(rf"^{ARCHIVE_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def partitioned():
+    return connection.vendor == "postgresql"
+
+
+def month_partition(month):
+    return f"{ARCHIVE_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def freeze_summary(poll):
+    """Rebuild the poll's choice counters from its votes and store the tallies."""
+    with transaction.atomic():
+        votes = Vote.objects.filter(poll=poll)
+        tallies = dict(
+            votes.order_by().values_list("choice").annotate(total=Count("pk"))
+        )
+        span = votes.aggregate(first=Min("voted_at"), last=Max("voted_at"))
+        rebuild_vote_counts(poll.choices.all())
+        summary, _ = PollSummary.objects.update_or_create(
+            poll=poll,
+            defaults={
+                "total_votes": sum(tallies.values()),
+                "tallies": {str(choice): total for choice, total in tallies.items()},
+                "first_vote_at": span["first"],
+                "last_vote_at": span["last"],
+                "votes_archived_at": None,
+            },
+        )
+        invalidate_poll(poll.pk)
+    return summary
+
+
+def create_month_partitions(poll):
+    """Create the archive partitions the poll's live votes will move into."""
+    months = Vote.objects.filter(poll=poll, archived=False).dates("voted_at", "month")
+    with connection.cursor() as cursor:
+        for month in months:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {month_partition(month)} "
+                f"PARTITION OF {ARCHIVE_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{next_month(month).isoformat()}')"
+            )
+    return [month_partition(month) for month in months]
+
+
+def move_votes(poll, archived, batch_size):
+    """Set ``archived`` on the poll's votes, a batch per transaction."""
+    moved = 0
+    pending = Vote.objects.filter(poll=poll, archived=not archived)
+    while True:
+        with transaction.atomic():
+            ids = list(pending.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return moved
+            moved += pending.filter(pk__in=ids).update(archived=archived)
+
+
+def archive_poll(poll, batch_size=None):
+    """Freeze an archived poll's tallies and move its votes to the archive."""
+    batch_size = batch_size or settings.VOTE_ARCHIVE_BATCH_SIZE
+    summary = freeze_summary(poll)
+    tables = create_month_partitions(poll) if partitioned() else []
+    moved = move_votes(poll, True, batch_size)
+    summary.votes_archived_at = timezone.now()
+    summary.save(update_fields=["votes_archived_at"])
+    if tables:
+        # The moved rows will not change again: freeze them once now rather
+        # than in an anti-wraparound vacuum later
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM (FREEZE, ANALYZE) {', '.join(tables)}")
+    return moved
+
+
+def restore_poll(poll, batch_size=None):
+    """
+    Move an unarchived poll's votes back to the live set. Returns how many
+    moved, or None if some were detached and the poll stays frozen.
+    """
+    batch_size = batch_size or settings.VOTE_ARCHIVE_BATCH_SIZE
+    summary = poll.summary
+    remaining = Vote.objects.filter(poll=poll).count()
+    if remaining < summary.total_votes:
+        logger.warning(
+            "Not restoring poll %s: %d of its %d votes were detached.",
+            poll.pk,
+            summary.total_votes - remaining,
+            summary.total_votes,
+        )
+        return None
+    moved = move_votes(poll, False, batch_size)
+    summary.delete()
+    return moved
+
+
+def archive_polls(batch_size=None):
+    """
+    Archive every poll marked ``is_archived`` whose votes are not yet moved,
+    and restore every unmarked one that was. Returns (archived, restored).
+    """
+    if settings.VOTE_WRITE_BEHIND:
+        # Votes still in the stream would land in the live partition later
+        write_behind.flush_stream()
+    to_archive = Poll.objects.filter(is_archived=True).exclude(
+        summary__votes_archived_at__isnull=False
+    )
+    to_restore = Poll.objects.filter(is_archived=False, summary__isnull=False)
+    archived = restored = 0
+    for poll in to_archive:
+        moved = archive_poll(poll, batch_size)
+        logger.info("Archived poll %s: %d votes moved.", poll.pk, moved)
+        archived += 1
+    for poll in to_restore.select_related("summary"):
+        if restore_poll(poll, batch_size) is not None:
+            restored += 1
+    return archived, restored
+
+
+def archive_partitions():
+    """Attached monthly archive partitions, as {first day of month: table}."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [ARCHIVE_TABLE],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = MONTH_PARTITION.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def detach_archive_partitions(before):
+    """
+    Detach the archive months that end on or before ``before`` (a date) into
+    standalone tables, and return their names. Their foreign keys are
+    dropped, so polls and users can still be deleted.
+    """
+    if not partitioned():
+        return []
+    detached = []
+    for month, table in sorted(archive_partitions().items()):
+        if next_month(month) > before:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} DETACH PARTITION {table}")
+            cursor.execute(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [table],
+            )
+            for (name,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        detached.append(table)
+    return detached
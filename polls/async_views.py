@@ -0,0 +1,94 @@
+"""
+Async versions of the poll list, detail and results pages, routed instead of
+the sync views when ``ASYNC_READ_VIEWS`` is on. Run them under the ASGI app
+(uvicorn workers), where a request waiting on the cache or the database does
+not hold a worker.
+
+Each view loads everything its template touches through the async ORM and
+cache API before rendering, since a lazy query inside a template would raise
+``SynchronousOnlyOperation``.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.template.response import TemplateResponse
+from voting_project.instrumentation import stage
+from .lifecycle import closed_results
+from .page_cache import AsyncAnonymousPageCacheMixin
+from .pagination import InvalidCursor, KeysetPaginator
+from .reach import poll_reach
+from .results_cache import aget_content_version, aget_results
+from .tallies import acompute_results
+from .views import PollDetailView, PollListView, PollResultsView
+
+
+class AsyncPollListView(AsyncAnonymousPageCacheMixin, PollListView):
+    async def render_page(self, request):
+        queryset = self.get_queryset()
+        if settings.POLL_LIST_PAGINATION == "cursor":
+            try:
+                page = await KeysetPaginator(queryset, self.paginate_by).apage(
+                    request.GET.get("cursor")
+                )
+            except InvalidCursor:
+                raise Http404("Invalid cursor.")
+            paginator = None
+        else:
+            paginator = Paginator(queryset, self.paginate_by)
+            # Counted up front, so the paginator never queries on its own
+            paginator.count = await queryset.acount()
+            try:
+                page = paginator.page(request.GET.get(self.page_kwarg) or 1)
+            except InvalidPage:
+                raise Http404("Invalid page.")
+            page.object_list = [poll async for poll in page.object_list.aiterator()]
+
+        self.object_list = page.object_list
+        context = {
+            "view": self,
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "object_list": page.object_list,
+            "polls": page.object_list,
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
+class AsyncPollDetailView(AsyncAnonymousPageCacheMixin, PollDetailView):
+    async def render_page(self, request, slug):
+        self.object = await aget_object_or_404(
+            self.get_queryset().prefetch_related("choices"), slug=slug
+        )
+        context = {
+            "view": self,
+            "object": self.object,
+            "poll": self.object,
+            "content_version": await aget_content_version(self.object.pk),
+            "fragment_cache_timeout": settings.PAGE_CACHE_TIMEOUT,
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+
+class AsyncPollResultsView(AsyncAnonymousPageCacheMixin, PollResultsView):
+    async def render_page(self, request, slug):
+        with stage("results", "lookup"):
+            self.object = await aget_object_or_404(self.get_queryset(), slug=slug)
+        results = closed_results(self.object)
+        if results is None:
+            with stage("results", "cache"):
+                results = await aget_results(self.object, acompute_results)
+        context = {
+            "view": self,
+            "object": self.object,
+            "poll": self.object,
+            "choices": results["choices"],
+            "total_votes": results["total_votes"],
+        }
+        if settings.REACH_ANALYTICS:
+            with stage("results", "reach"):
+                context["reach"] = await sync_to_async(poll_reach)(self.object.pk)
+        return TemplateResponse(request, self.template_name, context)
@@ -0,0 +1,36 @@
+from asgiref.sync import sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .live import group_name, snapshot
+from .models import Poll
+
+
+class PollResultsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams a poll's results: one snapshot on connect, then deltas. Both
+    carry a ``seq``; clients drop deltas at or below the snapshot's.
+    """
+
+    async def connect(self):
+        slug = self.scope["url_route"]["kwargs"]["slug"]
+        poll = await Poll.objects.only("pk", "slug").filter(slug=slug).afirst()
+        if poll is None:
+            await self.close()
+            return
+
+        self.group_name = group_name(poll.pk)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+        # Not the results cache: its entry may be older than the deltas
+        # that follow
+        results, sequence = await sync_to_async(snapshot)(poll)
+        await self.send_json({"type": "snapshot", "seq": sequence, **results})
+
+    async def disconnect(self, code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def results_delta(self, event):
+        await self.send_json(
+            {"type": "delta", "seq": event["seq"], "deltas": event["deltas"]}
+        )
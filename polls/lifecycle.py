@@ -0,0 +1,100 @@
+"""
+Poll lifecycle: open polls at ``start_date``, close them at ``end_date``.
+
+``run_lifecycle`` runs every ``POLL_LIFECYCLE_INTERVAL`` seconds from the
+``poll-lifecycle`` beat task, or in a loop from ``manage.py poll_lifecycle``.
+Opening and closing go through ``Poll.save()``, so the usual signals bump
+the cached list, detail and results pages.
+
+A closed poll takes no more votes, so its results are computed one last
+time into a ``ResultsSnapshot``. ``PollResultsView`` serves closed polls from
+it without touching the results cache or the choice counters. Reopening a
+poll means setting ``is_active`` and a later ``end_date``; its next close
+takes a fresh snapshot.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Poll, ResultsSnapshot
+from .tallies import compute_results
+from . import write_behind
+
+logger = logging.getLogger(__name__)
+
+
+def open_due_polls(now):
+    """Activate polls whose start_date has come. Returns how many opened."""
+    due = Poll.objects.filter(opened_at__isnull=True, start_date__lte=now)
+    opened = 0
+    for poll in due:
+        poll.is_active = True
+        poll.opened_at = now
+        poll.save(update_fields=["is_active", "opened_at"])
+        opened += 1
+    return opened
+
+
+def close_due_polls(now):
+    """Deactivate polls whose end_date has passed. Returns the closed polls."""
+    due = Poll.objects.filter(is_active=True, end_date__lte=now)
+    closed = []
+    for poll in due:
+        poll.is_active = False
+        poll.closed_at = now
+        poll.save(update_fields=["is_active", "closed_at"])
+        closed.append(poll)
+    return closed
+
+
+def take_snapshot(poll):
+    with transaction.atomic():
+        ResultsSnapshot.objects.update_or_create(
+            poll=poll, defaults={"results": compute_results(poll)}
+        )
+
+
+def closed_results(poll):
+    """A closed poll's snapshot results, or None for open polls."""
+    if not poll.is_closed:
+        return None
+    try:
+        return poll.results_snapshot.results
+    except ResultsSnapshot.DoesNotExist:
+        return None
+
+
+def run_lifecycle(now=None):
+    """Open and close the polls that are due. Returns (opened, closed)."""
+    now = now or timezone.now()
+    opened = open_due_polls(now)
+    closed = close_due_polls(now)
+    if closed and settings.VOTE_WRITE_BEHIND:
+        # Votes accepted before the close count towards the final results
+        write_behind.flush_stream()
+    # Closed since their last snapshot: the polls closed just now, and any a
+    # previous run did not get to
+    unsnapshotted = Poll.objects.filter(
+        Q(results_snapshot__isnull=True)
+        | Q(results_snapshot__taken_at__lt=F("closed_at")),
+        is_active=False,
+        closed_at__isnull=False,
+    )
+    for poll in unsnapshotted:
+        take_snapshot(poll)
+    if opened or closed:
+        logger.info("Opened %d poll(s), closed %d.", opened, len(closed))
+    return opened, len(closed)
+
+
+def run_forever(interval=None):
+    """Run the lifecycle every ``interval`` seconds, for deployments without beat."""
+    interval = interval or settings.POLL_LIFECYCLE_INTERVAL
+    while True:
+        started = time.monotonic()
+        run_lifecycle()
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
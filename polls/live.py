@@ -0,0 +1,121 @@
+"""
+Coalesced real-time results broadcasting.
+
+Every accepted vote adds to a per-poll delta hash in Redis. The first vote in
+a quiet period also schedules ``polls.tasks.broadcast_results`` to run after
+``RESULTS_BROADCAST_INTERVAL_MS``; that task drains the hash and sends one
+message to the poll's channel group. However many votes land in the window,
+watchers get a single ``results.delta`` event per poll per interval.
+
+Broadcasts are numbered. A watcher starts from ``snapshot()``: the current
+counts less the votes still waiting in the delta hash, tagged with the
+number of the last broadcast. Deltas numbered at or below it are already
+in the snapshot and are dropped by the client, and the next one carries
+the votes left out of it. The hash and the number are read before and after
+the count, which is retried until they agree, so a vote published while
+counting is not subtracted without having been counted.
+"""
+
+import logging
+
+import redis
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from kombu.exceptions import OperationalError
+from voting_project.utils import get_redis
+from .tallies import compute_results, with_percentages
+
+logger = logging.getLogger(__name__)
+
+# Counts retried by snapshot() while votes keep arriving
+SNAPSHOT_ATTEMPTS = 5
+
+
+def group_name(poll_id):
+    return f"poll_results_{poll_id}"
+
+
+def delta_key(poll_id):
+    return f"results:deltas:{poll_id}"
+
+
+def tick_key(poll_id):
+    return f"results:tick:{poll_id}"
+
+
+def sequence_key(poll_id):
+    return f"results:sequence:{poll_id}"
+
+
+def publish_vote(poll_id, choice_id):
+    """Record a vote for the next broadcast. Never fails the caller's request."""
+    from .tasks import broadcast_results
+
+    interval_ms = settings.RESULTS_BROADCAST_INTERVAL_MS
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hincrby(delta_key(poll_id), choice_id, 1)
+        pipe.set(tick_key(poll_id), 1, nx=True, px=interval_ms)
+        _, scheduled = pipe.execute()
+        if scheduled:
+            broadcast_results.apply_async((poll_id,), countdown=interval_ms / 1000)
+    except (redis.RedisError, OSError, OperationalError):
+        # OperationalError: the Celery broker is unreachable
+        logger.warning("Could not publish live results for poll %s", poll_id)
+
+
+def broadcast(poll_id):
+    """Send the accumulated deltas to the poll's watchers. Returns votes sent."""
+    pipe = get_redis().pipeline()
+    pipe.hgetall(delta_key(poll_id))
+    pipe.delete(delta_key(poll_id))
+    pipe.incr(sequence_key(poll_id))
+    pending, _, sequence = pipe.execute()
+    deltas = {choice_id: int(count) for choice_id, count in pending.items()}
+    if not deltas:
+        return 0
+
+    async_to_sync(get_channel_layer().group_send)(
+        group_name(poll_id),
+        {
+            "type": "results.delta",
+            "poll": poll_id,
+            "seq": sequence,
+            "deltas": deltas,
+        },
+    )
+    return sum(deltas.values())
+
+
+def snapshot(poll):
+    """
+    Fresh results for a new watcher, and the number of the last broadcast
+    they include.
+    """
+    try:
+        pending, sequence = _pending(poll.pk)
+        for _ in range(SNAPSHOT_ATTEMPTS):
+            choices = compute_results(poll)["choices"]
+            counted = pending, sequence
+            pending, sequence = _pending(poll.pk)
+            if (pending, sequence) == counted:
+                break
+        else:
+            # Still voting hard: at worst a vote published during the last
+            # count is off by one until the watcher reconnects
+            logger.warning("Results snapshot of poll %s did not settle", poll.pk)
+    except (redis.RedisError, OSError):
+        # No deltas will be broadcast either
+        return compute_results(poll), 0
+    for choice in choices:
+        choice["vote_count"] -= int(pending.get(str(choice["id"]), 0))
+    return with_percentages(choices), int(sequence or 0)
+
+
+def _pending(poll_id):
+    """The votes waiting for the next broadcast, and the last broadcast's number."""
+    pipe = get_redis().pipeline()
+    pipe.hgetall(delta_key(poll_id))
+    pipe.get(sequence_key(poll_id))
+    return tuple(pipe.execute())
@@ -0,0 +1,44 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from polls.archive import archive_polls, detach_archive_partitions
+
+
+def month(value):
+    try:
+        year, number = value.split("-")
+        return date(int(year), int(number), 1)
+    except ValueError:
+        raise CommandError(f"Expected a month as YYYY-MM, not {value!r}.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze the tallies of polls marked archived and move their votes to the "
+        "archive partitions (what the archive-polls beat task runs)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Votes moved per transaction (default VOTE_ARCHIVE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--detach-before",
+            metavar="YYYY-MM",
+            help="Then detach archive months before this one into standalone "
+            "tables (PostgreSQL)",
+        )
+
+    def handle(self, *args, **options):
+        before = options["detach_before"] and month(options["detach_before"])
+        archived, restored = archive_polls(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Archived {archived} poll(s), restored {restored} unarchived."
+            )
+        )
+        if before:
+            for table in detach_archive_partitions(before):
+                self.stdout.write(f"Detached {table}")
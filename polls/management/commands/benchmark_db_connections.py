@@ -0,0 +1,134 @@
+import copy
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+from polls.models import Choice, Poll
+
+MODES = ("per-request", "persistent", "pool")
+
+POLL_SQL = f"SELECT id, title FROM {Poll._meta.db_table} WHERE slug = %s"
+CHOICES_SQL = (
+    f"SELECT id, choice_text, vote_count FROM {Choice._meta.db_table} "
+    "WHERE poll_id = %s ORDER BY id"
+)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * pct / 100) - 1)]
+
+
+def mode_settings(mode, threads):
+    """The default database's settings, connecting the way ``mode`` does."""
+    settings_dict = copy.deepcopy(settings.DATABASES["default"])
+    options = settings_dict.setdefault("OPTIONS", {})
+    options.pop("pool", None)
+    settings_dict["CONN_MAX_AGE"] = None if mode == "persistent" else 0
+    settings_dict["CONN_HEALTH_CHECKS"] = mode != "per-request"
+    if mode == "pool":
+        options["pool"] = {"min_size": threads, "max_size": threads, "timeout": 10}
+    return settings_dict
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request latency of a poll detail read when connections are "
+        "opened per request, kept per thread, or taken from a psycopg pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help="Concurrent request threads, as in one gthread worker",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=MODES,
+            action="append",
+            help="Mode to run (repeatable; defaults to all the database supports)",
+        )
+
+    def handle(self, *args, **options):
+        slug = Poll.objects.values_list("slug", flat=True).first()
+        if slug is None:
+            raise CommandError("No polls to read; run simulate_activity first.")
+        postgres = settings.DATABASES["default"]["ENGINE"] == settings.POSTGRES_ENGINE
+        modes = options["mode"] or [m for m in MODES if postgres or m != "pool"]
+        if "pool" in modes and not postgres:
+            raise CommandError("The pool mode needs a PostgreSQL DATABASE_URL.")
+
+        self.stdout.write(
+            f"{'mode':<13}{'req/s':>9}{'mean ms':>9}{'p50':>8}{'p95':>8}"
+            f"{'p99':>8}{'connects':>10}"
+        )
+        for mode in modes:
+            row = self.run_mode(mode, slug, options["requests"], options["threads"])
+            self.stdout.write(
+                f"{mode:<13}{row['rps']:>9.0f}{row['mean']:>9.2f}{row['p50']:>8.2f}"
+                f"{row['p95']:>8.2f}{row['p99']:>8.2f}{row['connects']:>10}"
+            )
+
+    def run_mode(self, mode, slug, requests, threads):
+        # A handler of its own, so the run never touches the app's connections
+        handler = ConnectionHandler({DEFAULT_DB_ALIAS: mode_settings(mode, threads)})
+        settings_dict = handler.settings[DEFAULT_DB_ALIAS]
+        latencies = []
+        connects = []
+
+        def count_connect(sender, connection, **kwargs):
+            if connection.settings_dict is settings_dict:
+                connects.append(1)
+
+        def serve(count):
+            connection = handler[DEFAULT_DB_ALIAS]
+            for _ in range(count):
+                start = time.perf_counter()
+                # What the request_started and request_finished signals do
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    cursor.execute(POLL_SQL, [slug])
+                    poll_id = cursor.fetchone()[0]
+                    cursor.execute(CHOICES_SQL, [poll_id])
+                    cursor.fetchall()
+                connection.close_if_unusable_or_obsolete()
+                latencies.append(time.perf_counter() - start)
+            connection.close()
+
+        connection_created.connect(count_connect)
+        try:
+            workers = [
+                threading.Thread(target=serve, args=(requests // threads,))
+                for _ in range(threads)
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count_connect)
+
+        if mode == "pool":
+            pool = handler[DEFAULT_DB_ALIAS].pool
+            # Checkouts fire connection_created; count real connections instead
+            connects = [1] * pool.get_stats()["connections_num"]
+            handler[DEFAULT_DB_ALIAS].close_pool()
+
+        return {
+            "rps": len(latencies) / elapsed,
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "connects": len(connects),
+        }
@@ -0,0 +1,73 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from polls.models import Poll
+from voting_project.instrumentation import QueryCounter
+from voting_project.utils import generate_unique_slug, random_string
+
+User = get_user_model()
+
+
+def create_with_lookup(poll):
+    # The previous scheme: an exists() query per candidate slug, then INSERT
+    poll.slug = generate_unique_slug(poll, poll.title)
+    poll.save()
+
+
+def create_with_constraint(poll):
+    # Poll.save(): INSERT, retried with a suffix if the unique constraint fires
+    poll.save()
+
+
+STRATEGIES = {"lookup": create_with_lookup, "constraint": create_with_constraint}
+
+
+class Command(BaseCommand):
+    help = (
+        "Create many polls sharing one title and report how many queries and "
+        "how much time slug allocation costs per poll"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=100_000)
+        parser.add_argument("--title", default="Favorite language")
+        parser.add_argument(
+            "--strategy",
+            choices=sorted(STRATEGIES),
+            action="append",
+            help="Strategy to run (repeatable; defaults to all)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the created polls"
+        )
+
+    def handle(self, *args, **options):
+        creator, created = User.objects.get_or_create(
+            username="slug_benchmark",
+            defaults={"email": "slug_benchmark@example.invalid"},
+        )
+        # Tags this run's polls so they can be removed afterwards
+        tag = f"slug-benchmark-{random_string(6)}"
+
+        for name in options["strategy"] or sorted(STRATEGIES):
+            create = STRATEGIES[name]
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                for _ in range(options["count"]):
+                    create(
+                        Poll(title=options["title"], description=tag, creator=creator)
+                    )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name:<12}{options['count']} polls in {elapsed:.1f}s "
+                f"({options['count'] / elapsed:,.0f}/s), "
+                f"{counter.count / options['count']:.2f} queries/poll"
+            )
+            if not options["keep"]:
+                Poll.objects.filter(description=tag).delete()
+
+        if created and not options["keep"]:
+            creator.delete()
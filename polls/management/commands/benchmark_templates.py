@@ -0,0 +1,179 @@
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.backends.jinja2 import Jinja2
+from django.test import RequestFactory
+from django.utils import timezone
+from polls.models import Category, Choice, Poll
+
+User = get_user_model()
+
+TEMPLATES = {
+    "poll_list": "polls/poll_list.html",
+    "poll_detail": "polls/poll_detail.html",
+    "poll_results": "polls/poll_results.html",
+}
+
+
+def get_backends():
+    """The configured engines, plus a Jinja2 one built here if it isn't."""
+    backends = {"django": engines["django"]}
+    if settings.TEMPLATE_ENGINE == "jinja2":
+        backends["jinja2"] = engines["jinja2"]
+    else:
+        backends["jinja2"] = Jinja2(
+            {
+                "NAME": "jinja2",
+                "DIRS": [settings.BASE_DIR / "jinja2"],
+                "APP_DIRS": False,
+                "OPTIONS": {
+                    "environment": "voting_project.rendering.environment",
+                    "context_processors": settings.TEMPLATE_CONTEXT_PROCESSORS,
+                },
+            }
+        )
+    return backends
+
+
+def reset_cache(backend):
+    """Forget every compiled template, so the next load parses again."""
+    if isinstance(backend, Jinja2):
+        if backend.env.cache is not None:
+            backend.env.cache.clear()
+    else:
+        for loader in backend.engine.template_loaders:
+            loader.reset()
+
+
+def make_poll(pk, choice_count, creator, category):
+    # Unsaved objects with prefetched choices: rendering runs no queries
+    poll = Poll(
+        pk=pk,
+        title=f"Benchmark poll {pk}",
+        slug=f"benchmark-poll-{pk}",
+        description="Which of these options would you pick for the next release? " * 3,
+        creator=creator,
+        category=category,
+        created_at=timezone.now(),
+    )
+    choices = [
+        Choice(pk=pk * 1000 + i, poll=poll, choice_text=f"Option {i}", vote_count=i)
+        for i in range(choice_count)
+    ]
+    queryset = Choice.objects.none()
+    queryset._result_cache = choices
+    queryset._prefetch_done = True
+    poll._prefetched_objects_cache = {"choices": queryset}
+    poll.choice_count = choice_count
+    poll.vote_count = sum(choice.vote_count for choice in choices)
+    return poll
+
+
+def make_context(template, size):
+    """Context for ``template`` with ``size`` polls (list) or choices."""
+    creator = User(pk=1, username="benchmark")
+    category = Category(pk=1, name="Benchmarks", slug="benchmarks")
+    if template == "poll_list":
+        polls = [make_poll(pk, 4, creator, category) for pk in range(1, size + 1)]
+        page = Paginator(polls, size).page(1)
+        return {
+            "polls": page.object_list,
+            "page_obj": page,
+            "paginator": page.paginator,
+            "is_paginated": True,
+            "view": SimpleNamespace(with_counts=True),
+        }
+    poll = make_poll(1, size, creator, category)
+    if template == "poll_detail":
+        # A zero timeout renders the cached choices fragment every time
+        return {"poll": poll, "content_version": 0, "fragment_cache_timeout": 0}
+    total_votes = poll.vote_count
+    choices = [
+        {
+            "id": choice.pk,
+            "choice_text": choice.choice_text,
+            "vote_count": choice.vote_count,
+            "percentage": choice.vote_count / total_votes * 100 if total_votes else 0,
+        }
+        for choice in poll.choices.all()
+    ]
+    return {"poll": poll, "choices": choices, "total_votes": total_votes}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering the poll list, detail and results templates at several "
+        "page sizes, from the compiled-template cache (warm) and with a fresh "
+        "parse on every render (cold)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10, 50, 200],
+            help="Polls per list page, and choices per detail/results page",
+        )
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument(
+            "--engine",
+            choices=["django", "jinja2"],
+            action="append",
+            help="Engine to run (repeatable; defaults to both)",
+        )
+        parser.add_argument(
+            "--template",
+            choices=sorted(TEMPLATES),
+            action="append",
+            help="Template to run (repeatable; defaults to all)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TEMPLATE_CACHE:
+            self.stdout.write(
+                self.style.WARNING(
+                    "TEMPLATE_CACHE is off: Django templates are parsed on every "
+                    "render, so warm and cold times match."
+                )
+            )
+        backends = get_backends()
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        iterations = options["iterations"]
+
+        self.stdout.write(
+            f"{'engine':<8}{'template':<14}{'size':>6}{'warm ms':>10}"
+            f"{'cold ms':>10}{'parse':>8}{'KiB':>8}"
+        )
+        for engine in options["engine"] or sorted(backends):
+            backend = backends[engine]
+            for template in options["template"] or list(TEMPLATES):
+                name = TEMPLATES[template]
+                for size in options["sizes"]:
+                    context = make_context(template, size)
+
+                    compiled = backend.get_template(name)
+                    html = compiled.render(context, request)
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        compiled.render(context, request)
+                    warm = (time.perf_counter() - started) / iterations
+
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        reset_cache(backend)
+                        backend.get_template(name).render(context, request)
+                    cold = (time.perf_counter() - started) / iterations
+
+                    self.stdout.write(
+                        f"{engine:<8}{template:<14}{size:>6}{warm * 1000:>10.3f}"
+                        f"{cold * 1000:>10.3f}{1 - warm / cold:>8.0%}"
+                        f"{len(html) / 1024:>8.1f}"
+                    )
@@ -0,0 +1,116 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from polls.models import Choice, Poll
+
+User = get_user_model()
+
+STATEMENT = re.compile(r"\s*(?:WITH\b.*?\)\s*)?(SELECT|INSERT|UPDATE|DELETE)\b", re.S)
+BACKENDS = ("db", "cached_db", "cache", "signed_cookies")
+MESSAGE_STORAGES = {
+    "fallback": "django.contrib.messages.storage.fallback.FallbackStorage",
+    "cookie": "django.contrib.messages.storage.cookie.CookieStorage",
+    "session": "django.contrib.messages.storage.session.SessionStorage",
+}
+
+
+class StatementCounter:
+    """``execute_wrapper`` tallying session reads and writes, and all writes."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        match = STATEMENT.match(sql)
+        kind = match[1].upper() if match else "OTHER"
+        on_session = Session._meta.db_table in sql
+        if kind == "SELECT":
+            self.counts["session reads"] += on_session
+        elif kind != "OTHER":
+            self.counts["writes"] += 1
+            self.counts["session writes"] += on_session
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the database statements a vote and its redirect to the results "
+        "page cost, per session backend and message storage. Runs in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--votes", type=int, default=20)
+        parser.add_argument(
+            "--backend",
+            choices=BACKENDS,
+            action="append",
+            help="Session backend to measure (repeatable; default all)",
+        )
+        parser.add_argument(
+            "--messages",
+            choices=MESSAGE_STORAGES,
+            action="append",
+            help="Message storage to measure (repeatable; default fallback and "
+            "cookie)",
+        )
+
+    def handle(self, *args, **options):
+        backends = options["backend"] or BACKENDS
+        storages = options["messages"] or ["fallback", "cookie"]
+        self.stdout.write(
+            f"{'sessions':<16}{'messages':<10}{'visitor':<11}"
+            f"{'session reads':>15}{'session writes':>16}{'writes':>8}   per vote"
+        )
+        for backend in backends:
+            for storage in storages:
+                for signed_in in (False, True):
+                    counts = self.measure(backend, storage, signed_in, options)
+                    per_vote = {k: v / options["votes"] for k, v in counts.items()}
+                    self.stdout.write(
+                        f"{backend:<16}{storage:<10}"
+                        f"{'signed-in' if signed_in else 'anonymous':<11}"
+                        f"{per_vote['session reads']:>15.2f}"
+                        f"{per_vote['session writes']:>16.2f}"
+                        f"{per_vote['writes']:>8.2f}"
+                    )
+
+    def measure(self, backend, storage, signed_in, options):
+        counter = StatementCounter()
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            SESSION_ENGINE=f"django.contrib.sessions.backends.{backend}",
+            MESSAGE_STORAGE=MESSAGE_STORAGES[storage],
+            # Session-stored messages run over the budgets; don't log each
+            QUERY_BUDGETS={},
+        ):
+            user = User.objects.create_user(
+                "benchmark-vote-writes",
+                email="benchmark-vote-writes@example.invalid",
+                password=None,
+            )
+            poll = Poll.objects.create(
+                title="Benchmark vote writes",
+                creator=user,
+                allow_multiple_votes=True,
+            )
+            choice = Choice.objects.create(poll=poll, choice_text="Yes")
+            vote_url = reverse("polls:poll_vote", args=[poll.slug])
+
+            client = Client()
+            if signed_in:
+                client.force_login(user)
+            with connection.execute_wrapper(counter):
+                for _ in range(options["votes"]):
+                    response = client.post(vote_url, {"choice": choice.pk})
+                    client.get(response["Location"])
+            transaction.set_rollback(True)
+        return counter.counts
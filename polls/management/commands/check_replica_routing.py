@@ -0,0 +1,102 @@
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Poll
+from voting_project.instrumentation import QueryCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Walk a read, a vote and the reads after it through the test client and "
+        "check which database each one used. Point REPLICA_DATABASE_URLS at a "
+        "copy of the primary that stops receiving its writes, e.g. two SQLite "
+        "files: migrate and seed the first, then copy it to the second."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.READ_REPLICAS:
+            raise CommandError("Set REPLICA_DATABASE_URLS to check replica routing.")
+        now = timezone.now()
+        poll = (
+            Poll.objects.using(DEFAULT_DB_ALIAS)
+            .listed()
+            .filter(is_public=True, is_archived=False)
+            .filter(Q(end_date__isnull=True) | Q(end_date__gte=now))
+            .first()
+        )
+        if poll is None:
+            raise CommandError("No open public poll; run simulate_activity first.")
+        choice = poll.choices.using(DEFAULT_DB_ALIAS).first()
+        results_url = reverse("polls:poll_results", args=[poll.slug])
+
+        # A private cache, so every page is rendered from the database
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "check-replica-routing",
+                }
+            },
+        ):
+            client = Client(REMOTE_ADDR=f"10.{random.randrange(256)}.0.1")
+            failures = [
+                self.check_route(
+                    "poll list reads from a replica",
+                    lambda: client.get(reverse("polls:poll_list")),
+                    "replica",
+                ),
+                self.check_route(
+                    "vote writes to the primary",
+                    lambda: client.post(
+                        reverse("polls:poll_vote", args=[poll.slug]),
+                        {"choice": choice.pk},
+                    ),
+                    "primary",
+                ),
+                self.check_route(
+                    "results read from the primary after voting",
+                    lambda: client.get(results_url),
+                    "primary",
+                ),
+            ]
+            client.cookies.pop(settings.REPLICA_STICKY_COOKIE)
+            failures.append(
+                self.check_route(
+                    "results read from a replica once the sticky window ends",
+                    lambda: client.get(results_url),
+                    "replica",
+                )
+            )
+
+        if any(failures):
+            raise CommandError("Replica routing check failed.")
+
+    def check_route(self, label, make_request, expected):
+        counters = {alias: QueryCounter() for alias in settings.DATABASES}
+        with ExitStack() as stack:
+            for alias, counter in counters.items():
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = make_request()
+
+        primary = counters[DEFAULT_DB_ALIAS].count
+        replica = sum(c.count for a, c in counters.items() if a != DEFAULT_DB_ALIAS)
+        if expected == "replica":
+            ok = replica > 0 and primary == 0
+        else:
+            ok = primary > 0 and replica == 0
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(
+            style(f"{'ok  ' if ok else 'FAIL'} {label}")
+            + f" (HTTP {response.status_code}, primary {primary} queries, "
+            f"replicas {replica})"
+        )
+        return not ok
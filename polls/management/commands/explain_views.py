@@ -0,0 +1,113 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from polls.models import Poll
+
+# A plan line that reads a whole table instead of going through an index
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on every SELECT issued by the hot poll views and fail if "
+        "any of them falls back to a sequential scan"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            dest="slug",
+            help="Poll to exercise (defaults to the newest listed poll)",
+        )
+        parser.add_argument(
+            "--allow-table",
+            action="append",
+            default=[],
+            help="Table allowed to be scanned sequentially (repeatable)",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print every plan, not only the offending ones",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f"EXPLAIN checks are not supported on {vendor}.")
+        pattern = SEQ_SCAN_PATTERNS[vendor]
+
+        if options["slug"]:
+            poll = Poll.objects.filter(slug=options["slug"]).first()
+        else:
+            poll = Poll.objects.listed().first()
+        if poll is None:
+            raise CommandError("No poll to exercise; seed some data first.")
+        choice = poll.choices.first()
+
+        requests = [
+            ("GET", reverse("polls:poll_list"), None),
+            ("GET", reverse("polls:poll_detail", args=[poll.slug]), None),
+            ("GET", reverse("polls:poll_results", args=[poll.slug]), None),
+            ("POST", reverse("polls:poll_vote", args=[poll.slug]), choice),
+            ("GET", reverse("api:poll_list"), None),
+            ("GET", reverse("api:poll_detail", args=[poll.slug]), None),
+            ("GET", reverse("api:poll_results", args=[poll.slug]), None),
+        ]
+
+        failures = 0
+        client = Client(HTTP_HOST="localhost", REMOTE_ADDR="203.0.113.7")
+        for method, url, choice in requests:
+            queries = self.capture(client, method, url, choice)
+            for sql in queries:
+                plan = self.explain(sql)
+                scanned = set(pattern.findall(plan)) - set(options["allow_table"])
+                if scanned:
+                    failures += 1
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"{method} {url}: sequential scan on "
+                            f"{', '.join(sorted(scanned))}"
+                        )
+                    )
+                    self.stdout.write(f"  {sql}\n{plan}\n")
+                elif options["verbose_plans"]:
+                    self.stdout.write(f"{method} {url}\n  {sql}\n{plan}\n")
+            self.stdout.write(f"{method} {url}: {len(queries)} select(s) checked")
+
+        if failures:
+            raise CommandError(f"{failures} query plan(s) use a sequential scan.")
+        self.stdout.write(self.style.SUCCESS("✓ Every query plan uses an index."))
+
+    def capture(self, client, method, url, choice):
+        # Votes are rolled back so the check leaves the data untouched
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                if method == "POST":
+                    client.post(url, {"choice": choice.pk})
+                else:
+                    client.get(url)
+            transaction.set_rollback(True)
+        return [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].lstrip().upper().startswith("SELECT")
+        ]
+
+    def explain(self, sql):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Only report scans the planner cannot avoid, not ones it
+                # prefers because the seeded tables are still small.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute(f"EXPLAIN {sql}")
+                return "\n".join(row[0] for row in cursor.fetchall())
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return "\n".join(row[-1] for row in cursor.fetchall())
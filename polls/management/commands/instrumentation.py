@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from voting_project.instrumentation import MODES, get_mode, set_mode
+
+
+class Command(BaseCommand):
+    help = (
+        "Show or switch the runtime instrumentation mode: 'full' records stage "
+        "histograms and query counts, 'minimal' skips them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mode", nargs="?", choices=MODES)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Drop the runtime override and fall back to INSTRUMENTATION_MODE",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            set_mode(None)
+        elif options["mode"]:
+            set_mode(options["mode"])
+
+        self.stdout.write(f"Instrumentation mode: {get_mode()}")
+        if options["reset"] or options["mode"]:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "✓ Running processes pick this up within "
+                    f"{settings.INSTRUMENTATION_MODE_TTL:g}s."
+                )
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from polls.lifecycle import run_forever, run_lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        "Open polls whose start date has come, close those past their end date "
+        "and snapshot their results (what the poll-lifecycle beat task runs)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running every --interval seconds instead of once",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Seconds between runs with --loop (default POLL_LIFECYCLE_INTERVAL)",
+        )
+
+    def handle(self, *args, **options):
+        if options["loop"]:
+            run_forever(options["interval"])
+        opened, closed = run_lifecycle()
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ Opened {opened} poll(s), closed {closed}.")
+        )
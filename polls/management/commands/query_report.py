@@ -0,0 +1,103 @@
+import json
+import math
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = {
+    "violations": lambda row: (row["violations"], row["p95_queries"]),
+    "queries": lambda row: (row["p95_queries"], row["max_queries"]),
+    "time": lambda row: (row["total_db_ms"], row["p95_queries"]),
+    "requests": lambda row: (row["requests"], row["p95_queries"]),
+}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[max(0, math.ceil(len(values) * pct / 100) - 1)]
+
+
+def read_records(stream):
+    """Yield the query records logged by QueryBudgetMiddleware, skipping noise."""
+    for line in stream:
+        start = line.find("{")
+        if start == -1:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("event") == "db_queries":
+            yield record
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the per-request query log written by QueryBudgetMiddleware "
+        "(run the app with QUERY_LOG_LEVEL=INFO) and list the worst views, e.g. "
+        "`kubectl logs deploy/django | python manage.py query_report`"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "logs",
+            nargs="*",
+            default=["-"],
+            help="Log files to read ('-' for stdin, the default)",
+        )
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="violations")
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        by_view = defaultdict(list)
+        for path in options["logs"]:
+            if path == "-":
+                records = read_records(sys.stdin)
+            else:
+                try:
+                    with open(path) as f:
+                        records = list(read_records(f))
+                except OSError as e:
+                    raise CommandError(f"Could not read {path}: {e}")
+            for record in records:
+                by_view[record["view"]].append(record)
+
+        if not by_view:
+            raise CommandError("No query records found in the logs.")
+
+        rows = []
+        for view, records in by_view.items():
+            queries = [r["queries"] for r in records]
+            budget = records[-1]["budget"]
+            rows.append(
+                {
+                    "view": view,
+                    "requests": len(records),
+                    "avg_queries": sum(queries) / len(queries),
+                    "p95_queries": percentile(queries, 95),
+                    "max_queries": max(queries),
+                    "total_db_ms": sum(r["db_ms"] for r in records),
+                    "p95_db_ms": percentile([r["db_ms"] for r in records], 95),
+                    "budget": budget,
+                    "violations": sum(
+                        1 for q in queries if budget is not None and q > budget
+                    ),
+                }
+            )
+        rows.sort(key=SORT_KEYS[options["sort"]], reverse=True)
+
+        self.stdout.write(
+            f"{'view':<28}{'requests':>9}{'avg q':>8}{'p95 q':>7}{'max q':>7}"
+            f"{'budget':>8}{'over':>7}{'p95 ms':>9}{'total ms':>11}"
+        )
+        for row in rows[: options["limit"]]:
+            line = (
+                f"{row['view']:<28}{row['requests']:>9}{row['avg_queries']:>8.1f}"
+                f"{row['p95_queries']:>7}{row['max_queries']:>7}"
+                f"{'-' if row['budget'] is None else row['budget']:>8}"
+                f"{row['violations']:>7}{row['p95_db_ms']:>9.1f}"
+                f"{row['total_db_ms']:>11.1f}"
+            )
+            style = self.style.ERROR if row["violations"] else self.style.SUCCESS
+            self.stdout.write(style(line))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from polls import reach
+from polls.models import Category, Poll, Vote
+from voting_project.utils import get_redis
+
+BACKFILL_BATCH = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Print approximate unique voters and IPs per category, or per poll of "
+        "one category, from the Redis HyperLogLogs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--category",
+            dest="slug",
+            help="List the polls of the category with this slug",
+        )
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First add every stored vote to the HyperLogLogs (safe to repeat)",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self.stdout.write(f"Backfilled {self.backfill()} vote(s).")
+
+        if options["slug"]:
+            try:
+                category = Category.objects.get(slug=options["slug"])
+            except Category.DoesNotExist:
+                raise CommandError(f"Category '{options['slug']}' does not exist.")
+            polls = list(category.polls.order_by("-created_at").only("pk", "slug"))
+            for poll in polls:
+                self.write_row(poll.slug, reach.poll_reach(poll.pk))
+            self.write_row(
+                f"{category.slug} (all)", reach.merged_reach(p.pk for p in polls)
+            )
+            return
+
+        for category, totals in sorted(reach.category_reach().items()):
+            self.write_row(category, totals)
+        uncategorised = Poll.objects.filter(category__isnull=True)
+        self.write_row(
+            "(uncategorised)",
+            reach.merged_reach(uncategorised.values_list("pk", flat=True)),
+        )
+
+    def write_row(self, name, totals):
+        if totals is None:
+            raise CommandError("Redis is unreachable.")
+        self.stdout.write(
+            f"{name:<40}{totals['voters']:>10} voters{totals['ips']:>10} IPs"
+        )
+
+    def backfill(self):
+        votes = Vote.objects.order_by().values_list("poll_id", "user_id", "ip_address")
+        pipe = get_redis().pipeline(transaction=False)
+        added = 0
+        for poll_id, user_id, ip_address in votes.iterator(chunk_size=BACKFILL_BATCH):
+            pipe.pfadd(reach.voters_key(poll_id), reach.voter_id(user_id, ip_address))
+            if ip_address:
+                pipe.pfadd(reach.ips_key(poll_id), ip_address)
+            added += 1
+            if added % BACKFILL_BATCH == 0:
+                pipe.execute()
+        pipe.execute()
+        return added
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from polls import voter_filter
+from polls.models import Poll, Vote
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the anonymous voter Bloom filters in Redis from Vote rows, for "
+        "open polls that take one vote per voter"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            dest="slug",
+            help="Only rebuild the filter of the poll with this slug",
+        )
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.filter(
+            is_active=True, is_archived=False, allow_multiple_votes=False
+        )
+        if options["slug"]:
+            polls = polls.filter(slug=options["slug"])
+            if not polls:
+                raise CommandError(
+                    f"Poll '{options['slug']}' does not exist, is closed or "
+                    "takes multiple votes."
+                )
+
+        bits, hashes = voter_filter.size()
+        rebuilt = 0
+        for poll in polls.only("pk", "slug"):
+            addresses = (
+                Vote.objects.filter(
+                    poll=poll,
+                    user__isnull=True,
+                    ip_address__isnull=False,
+                    enforce_unique=True,
+                )
+                .order_by()
+                .values_list("ip_address", flat=True)
+                .distinct()
+                .iterator()
+            )
+            voter_filter.rebuild(poll.slug, addresses)
+            rebuilt += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Rebuilt {rebuilt} filter(s) of {bits} bits and {hashes} hashes."
+            )
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from polls.models import Poll, PollSummary
+from polls.tallies import counted_choices, find_drift, rebuild_vote_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized Choice.vote_count counters from Vote rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll",
+            dest="slug",
+            help="Only reconcile the choices of the poll with this slug",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report counters that have drifted without fixing them",
+        )
+
+    def handle(self, *args, **options):
+        choices = counted_choices()
+        if options["slug"]:
+            try:
+                poll = Poll.objects.get(slug=options["slug"])
+            except Poll.DoesNotExist:
+                raise CommandError(f"Poll '{options['slug']}' does not exist.")
+            if PollSummary.objects.filter(poll=poll).exists():
+                raise CommandError(
+                    f"Poll '{poll.slug}' is archived; its tallies are frozen."
+                )
+            choices = choices.filter(poll=poll)
+
+        drifted = 0
+        for choice, stored, actual in find_drift(choices):
+            drifted += 1
+            self.stdout.write(f"{choice}: stored {stored}, actual {actual}")
+
+        if options["dry_run"]:
+            self.stdout.write(
+                self.style.WARNING(f"{drifted} counter(s) out of sync (dry run).")
+            )
+            return
+
+        updated = rebuild_vote_counts(choices)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Rebuilt {updated} counter(s), {drifted} had drifted."
+            )
+        )
@@ -1,18 +1,116 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.text import slugify
 from polls.models import Poll, Choice, Vote, Category
+from polls.results_cache import LIST_VERSION_KEY, bump_counter
+from polls.tallies import rebuild_vote_counts
+from voting_project.utils import random_string
+import itertools
 import random
+import time
 
 # Import the Prometheus counter
-from polls.views import votes_cast_total
+from polls.voting import votes_cast_total
 
 User = get_user_model()
 
+POLL_DATA = [
+    {
+        "title": "What is your favorite cloud provider?",
+        "description": "Choose your preferred cloud platform",
+        "choices": ["AWS", "Azure", "GCP", "DigitalOcean"],
+    },
+    {
+        "title": "Best database for production?",
+        "description": "Which database do you trust most?",
+        "choices": ["PostgreSQL", "MySQL", "MongoDB", "SQLite"],
+    },
+    {
+        "title": "DevSecOps tool of choice?",
+        "description": "Your favorite security scanning tool",
+        "choices": ["Trivy", "Snyk", "Bandit", "Checkov"],
+    },
+    {
+        "title": "Preferred CI/CD platform?",
+        "description": "Which CI/CD do you use?",
+        "choices": ["GitHub Actions", "GitLab CI", "Jenkins", "CircleCI"],
+    },
+    {
+        "title": "Container orchestration preference?",
+        "description": "How do you manage containers?",
+        "choices": ["Kubernetes", "Docker Swarm", "Nomad", "ECS"],
+    },
+]
+
+PASSWORD = "testpass123"
+# Keep generated slugs inside SlugField's 50 characters
+SLUG_PREFIX_LENGTH = 30
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` items without materializing `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def cumulative_weights(count, distribution, exponent):
+    """Weights for random.choices: None for uniform, 1/rank**s for zipf."""
+    if distribution == "uniform":
+        return None
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1))
+    )
+
 
 class Command(BaseCommand):
-    help = "Simulate user activity for testing Grafana dashboards"
+    help = (
+        "Simulate user activity for testing Grafana dashboards. Scales to "
+        "production-sized data sets with bulk inserts, e.g. "
+        "--users 100000 --polls 10000 --votes 10000000 --distribution zipf"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=5,
+            help="Test users to vote with; existing testuser_N accounts are reused",
+        )
+        parser.add_argument("--polls", type=int, default=5, help="Polls to create")
+        parser.add_argument("--votes", type=int, default=50, help="Votes to cast")
+        parser.add_argument(
+            "--distribution",
+            choices=["uniform", "zipf"],
+            default="uniform",
+            help="How votes spread over polls and their choices",
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.1,
+            help="Skew of the zipf distribution (default: 1.1)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk insert (default: 5000)",
+        )
+        parser.add_argument("--seed", type=int, help="Random seed for repeatable runs")
 
     def handle(self, *args, **options):
+        for name in ("users", "polls", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1.")
+        if options["seed"] is not None:
+            random.seed(options["seed"])
+        self.batch_size = options["batch_size"]
+
         self.stdout.write(self.style.SUCCESS("Starting activity simulation..."))
 
         # Create categories
@@ -21,105 +119,138 @@ class Command(BaseCommand):
             cat, _ = Category.objects.get_or_create(name=cat_name)
             categories.append(cat)
 
-        # Create users
-        users = []
-        for i in range(5):
-            username = f"testuser_{i}"
-            user, created = User.objects.get_or_create(
-                username=username,
-                defaults={
-                    "email": f"{username}@example.com",
-                    "first_name": "Test",
-                    "last_name": f"User{i}",
-                },
-            )
-            if created:
-                user.set_password("testpass123")
-                user.save()
-                self.stdout.write(f"Created user: {username}")
-            users.append(user)
-
-        # Create polls
-        poll_data = [
-            {
-                "title": "What is your favorite cloud provider?",
-                "description": "Choose your preferred cloud platform",
-                "choices": ["AWS", "Azure", "GCP", "DigitalOcean"],
-            },
-            {
-                "title": "Best database for production?",
-                "description": "Which database do you trust most?",
-                "choices": ["PostgreSQL", "MySQL", "MongoDB", "SQLite"],
-            },
-            {
-                "title": "DevSecOps tool of choice?",
-                "description": "Your favorite security scanning tool",
-                "choices": ["Trivy", "Snyk", "Bandit", "Checkov"],
-            },
-            {
-                "title": "Preferred CI/CD platform?",
-                "description": "Which CI/CD do you use?",
-                "choices": ["GitHub Actions", "GitLab CI", "Jenkins", "CircleCI"],
-            },
-            {
-                "title": "Container orchestration preference?",
-                "description": "How do you manage containers?",
-                "choices": ["Kubernetes", "Docker Swarm", "Nomad", "ECS"],
-            },
-        ]
-
-        polls = []
-        # Use shorter random suffix to avoid slug length issues
-        run_id = random.randint(1000, 9999)
-
-        for i, data in enumerate(poll_data):
-            creator = users[i % len(users)]
-            # Add short random ID to make polls unique each run
-            unique_title = f"{data['title']} #{run_id}"
-            poll = Poll.objects.create(
-                title=unique_title,
-                description=data["description"],
-                creator=creator,
-                category=random.choice(categories),
-                is_public=True,
-                allow_multiple_votes=False,
-            )
-
-            # Create choices
-            for choice_text in data["choices"]:
-                Choice.objects.create(poll=poll, choice_text=choice_text)
-            self.stdout.write(f"Created poll: {poll.title}")
-            polls.append(poll)
+        user_ids = self.create_users(options["users"])
+        choices_by_poll = self.create_polls(options["polls"], user_ids, categories)
 
         # Simulate voting
         self.stdout.write(self.style.WARNING("Simulating votes..."))
-        vote_count = 0
+        vote_count = self.cast_votes(
+            options["votes"],
+            user_ids,
+            choices_by_poll,
+            options["distribution"],
+            options["zipf_exponent"],
+        )
+        # Increment the Prometheus counter just like the real VoteView does
+        votes_cast_total.inc(vote_count)
 
-        for _ in range(50):  # Create 50 random votes
-            user = random.choice(users)
-            poll = random.choice(polls)
+        self.stdout.write(self.style.SUCCESS(f"✓ Created {len(user_ids)} users"))
+        self.stdout.write(self.style.SUCCESS(f"✓ Created {len(choices_by_poll)} polls"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Simulated {vote_count} votes "
+                f"({options['votes'] - vote_count} duplicates skipped)"
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS("Simulation complete! Check your Grafana dashboard.")
+        )
+
+    def create_users(self, count):
+        # Hash once: a password hash per user would dominate large runs
+        password = make_password(PASSWORD)
+        users = (
+            User(
+                username=f"testuser_{i}",
+                email=f"testuser_{i}@example.com",
+                first_name="Test",
+                last_name=f"User{i}",
+                password=password,
+            )
+            for i in range(count)
+        )
+        user_ids = []
+        for batch in chunked(users, self.batch_size):
+            User.objects.bulk_create(batch, ignore_conflicts=True)
+            usernames = [user.username for user in batch]
+            user_ids.extend(
+                User.objects.filter(username__in=usernames).values_list("pk", flat=True)
+            )
+        return user_ids
 
-            # Check if user already voted
-            if Vote.objects.filter(poll=poll, user=user).exists():
-                continue
+    def create_polls(self, count, user_ids, categories):
+        """Create polls with their choices. Returns {poll id: [choice ids]}."""
+        # bulk_create skips Poll.save(), so build unique slugs and mark the
+        # polls opened here
+        run_id = random_string(6)
+        now = timezone.now()
 
-            # Get random choice from poll
-            choices = list(poll.choices.all())
-            if not choices:
-                continue
+        def polls():
+            for i in range(count):
+                data = POLL_DATA[i % len(POLL_DATA)]
+                prefix = slugify(data["title"])[:SLUG_PREFIX_LENGTH].rstrip("-")
+                poll = Poll(
+                    title=f"{data['title']} #{run_id}-{i}",
+                    slug=f"{prefix}-{run_id}-{i}",
+                    description=data["description"],
+                    creator_id=random.choice(user_ids),
+                    category=random.choice(categories),
+                    is_public=True,
+                    allow_multiple_votes=False,
+                    opened_at=now,
+                )
+                yield poll, data["choices"]
 
-            choice = random.choice(choices)
+        choices_by_poll = {}
+        for batch in chunked(polls(), self.batch_size):
+            with transaction.atomic():
+                Poll.objects.bulk_create([poll for poll, _ in batch])
+                choices = [
+                    Choice(poll_id=poll.pk, choice_text=choice_text, order=order)
+                    for poll, choice_texts in batch
+                    for order, choice_text in enumerate(choice_texts)
+                ]
+                Choice.objects.bulk_create(choices, batch_size=self.batch_size)
+            for choice in choices:
+                choices_by_poll.setdefault(choice.poll_id, []).append(choice.pk)
+            self.stdout.write(f"Created {len(choices_by_poll)} polls")
+        # bulk_create sends no signals, so expire cached poll list pages here
+        bump_counter(LIST_VERSION_KEY)
+        return choices_by_poll
 
-            Vote.objects.create(
-                poll=poll, choice=choice, user=user, ip_address="127.0.0.1"
-            )
-            # Increment the Prometheus counter just like the real VoteView does
-            votes_cast_total.inc()
-            vote_count += 1
+    def cast_votes(self, count, user_ids, choices_by_poll, distribution, exponent):
+        """Bulk insert `count` votes. Returns how many survived de-duplication."""
+        poll_ids = list(choices_by_poll)
+        poll_weights = cumulative_weights(len(poll_ids), distribution, exponent)
+        choice_weights = {}
 
-        self.stdout.write(self.style.SUCCESS(f"✓ Created {len(users)} users"))
-        self.stdout.write(self.style.SUCCESS(f"✓ Created {len(polls)} polls"))
-        self.stdout.write(self.style.SUCCESS(f"✓ Simulated {vote_count} votes"))
-        self.stdout.write(
-            self.style.SUCCESS("Simulation complete! Check your Grafana dashboard.")
-        )
+        def votes():
+            for offset in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - offset)
+                for poll_id in random.choices(
+                    poll_ids, cum_weights=poll_weights, k=size
+                ):
+                    choice_ids = choices_by_poll[poll_id]
+                    n = len(choice_ids)
+                    if n not in choice_weights:
+                        choice_weights[n] = cumulative_weights(
+                            n, distribution, exponent
+                        )
+                    yield Vote(
+                        poll_id=poll_id,
+                        choice_id=random.choices(
+                            choice_ids, cum_weights=choice_weights[n]
+                        )[0],
+                        user_id=random.choice(user_ids),
+                        ip_address="127.0.0.1",
+                        enforce_unique=True,
+                    )
+
+        started = last_report = time.monotonic()
+        generated = 0
+        for batch in chunked(votes(), self.batch_size):
+            # A user voting twice in a poll hits the unique constraint; drop it
+            Vote.objects.bulk_create(batch, ignore_conflicts=True)
+            generated += len(batch)
+            if time.monotonic() - last_report >= 5:
+                last_report = time.monotonic()
+                rate = generated / (last_report - started)
+                self.stdout.write(f"  {generated}/{count} votes ({rate:,.0f}/s)")
+
+        # Votes were inserted without bumping counters; rebuild them once
+        inserted = 0
+        for batch in chunked(poll_ids, self.batch_size):
+            choices = Choice.objects.filter(poll_id__in=batch)
+            rebuild_vote_counts(choices)
+            inserted += choices.aggregate(total=Sum("vote_count"))["total"] or 0
+        return inserted
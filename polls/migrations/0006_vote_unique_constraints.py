@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def mark_unique_votes(apps, schema_editor):
+    Vote = apps.get_model("polls", "Vote")
+    Vote.objects.filter(poll__allow_multiple_votes=False).update(enforce_unique=True)
+
+    # Earlier pre-check races may have let duplicates through; keep the first
+    # vote of each voter under the constraint and leave the rest unconstrained.
+    for key, anonymous in (("user", False), ("ip_address", True)):
+        constrained = Vote.objects.filter(enforce_unique=True, user__isnull=anonymous)
+        first_votes = (
+            constrained.order_by().values("poll", key).annotate(first=Min("pk"))
+        )
+        constrained.exclude(pk__in=first_votes.values("first")).update(
+            enforce_unique=False
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0005_query_pattern_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vote",
+            name="enforce_unique",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_unique_votes, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="vote",
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name="vote",
+            name="vote_anon_poll_ip_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="vote",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("enforce_unique", True), ("user__isnull", False)),
+                fields=("poll", "user"),
+                name="vote_unique_user",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="vote",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("enforce_unique", True), ("user__isnull", True)),
+                fields=("poll", "ip_address"),
+                name="vote_unique_anon_ip",
+            ),
+        ),
+    ]
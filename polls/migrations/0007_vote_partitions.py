@@ -0,0 +1,159 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+VOTE_TABLE = "polls_vote"
+
+# Live votes: the only partition that takes inserts, so it alone carries the
+# primary key and the duplicate-vote unique indexes. Archived votes are moved
+# into monthly partitions by polls.archive. Moving polls out leaves dead rows
+# behind, hence the eager autovacuum.
+PARTITION_SQL = (
+    """
+    CREATE TABLE polls_vote_live PARTITION OF polls_vote FOR VALUES IN (false)
+    WITH (
+        autovacuum_vacuum_scale_factor = 0.02,
+        autovacuum_analyze_scale_factor = 0.02
+    )
+    """,
+    """
+    CREATE TABLE polls_vote_archive PARTITION OF polls_vote FOR VALUES IN (true)
+    PARTITION BY RANGE (voted_at)
+    """,
+)
+
+
+def table_definitions(cursor, tables):
+    """The constraints and index definitions on ``tables``, to rebuild them."""
+    # Constraints and indexes a partition inherited come back with the parent's
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = ANY(%s::regclass[]) AND contype IN ('p', 'f') "
+        "AND conparentid = 0",
+        [tables],
+    )
+    constraints = cursor.fetchall()
+    # Indexes backing the primary key are rebuilt with it
+    cursor.execute(
+        "SELECT c.relname, pg_get_indexdef(x.indexrelid), x.indisunique "
+        "FROM pg_index x JOIN pg_class c ON c.oid = x.indexrelid "
+        "WHERE x.indrelid = ANY(%s::regclass[]) AND NOT x.indisprimary "
+        "AND NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = x.indexrelid)",
+        [tables],
+    )
+    return constraints, cursor.fetchall()
+
+
+def on_table(indexdef, table):
+    return re.sub(r" ON (ONLY )?\S+ USING ", f" ON {table} USING ", indexdef, count=1)
+
+
+def rebuild_vote_table(schema_editor, partitioned):
+    """
+    Copy the vote table into a new one, partitioned on ``archived`` or not,
+    and recreate its keys and indexes under their old names.
+    """
+    old = f"{VOTE_TABLE}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [VOTE_TABLE])
+        (sequence,) = cursor.fetchone()
+        old_tables = [VOTE_TABLE] if partitioned else [VOTE_TABLE, "polls_vote_live"]
+        constraints, indexes = table_definitions(cursor, old_tables)
+        cursor.execute(f"ALTER TABLE {VOTE_TABLE} RENAME TO {old}")
+        cursor.execute(f"ALTER SEQUENCE {sequence} RENAME TO {old}_id_seq")
+
+        cursor.execute(
+            f"CREATE TABLE {VOTE_TABLE} (LIKE {old})"
+            + (" PARTITION BY LIST (archived)" if partitioned else "")
+        )
+        cursor.execute(
+            f"ALTER TABLE {VOTE_TABLE} ALTER COLUMN archived SET DEFAULT false"
+        )
+        if partitioned:
+            # Identity columns need PostgreSQL 17 on partitioned tables
+            cursor.execute(f"CREATE SEQUENCE {VOTE_TABLE}_id_seq AS bigint")
+            cursor.execute(
+                f"ALTER TABLE {VOTE_TABLE} ALTER COLUMN id "
+                f"SET DEFAULT nextval('{VOTE_TABLE}_id_seq')"
+            )
+            cursor.execute(
+                f"ALTER SEQUENCE {VOTE_TABLE}_id_seq OWNED BY {VOTE_TABLE}.id"
+            )
+            for statement in PARTITION_SQL:
+                cursor.execute(statement)
+        else:
+            cursor.execute(
+                f"ALTER TABLE {VOTE_TABLE} ALTER COLUMN id "
+                "ADD GENERATED BY DEFAULT AS IDENTITY"
+            )
+        cursor.execute(f"INSERT INTO {VOTE_TABLE} SELECT * FROM {old}")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+            f"COALESCE((SELECT max(id) FROM {VOTE_TABLE}), 0) + 1, false)",
+            [VOTE_TABLE],
+        )
+        # Frees the old names, and drops the old sequence with the table
+        cursor.execute(f"DROP TABLE {old}")
+
+        hot_table = "polls_vote_live" if partitioned else VOTE_TABLE
+        for name, kind, definition in constraints:
+            table = hot_table if kind == "p" else VOTE_TABLE
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+        for name, definition, unique in indexes:
+            # Unique indexes on a partitioned table would have to include
+            # archived; only live votes are ever checked for duplicates
+            table = hot_table if unique else VOTE_TABLE
+            cursor.execute(on_table(definition, table))
+
+
+def partition_votes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        rebuild_vote_table(schema_editor, partitioned=True)
+
+
+def unpartition_votes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        rebuild_vote_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0006_vote_unique_constraints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PollSummary",
+            fields=[
+                (
+                    "poll",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="polls.poll",
+                    ),
+                ),
+                ("total_votes", models.PositiveIntegerField()),
+                ("tallies", models.JSONField()),
+                ("first_vote_at", models.DateTimeField(blank=True, null=True)),
+                ("last_vote_at", models.DateTimeField(blank=True, null=True)),
+                ("frozen_at", models.DateTimeField(auto_now_add=True)),
+                ("votes_archived_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "poll summaries",
+            },
+        ),
+        migrations.AddField(
+            model_name="vote",
+            name="archived",
+            field=models.BooleanField(db_default=False, default=False, editable=False),
+        ),
+        migrations.RunPython(partition_votes, unpartition_votes),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_opened(apps, schema_editor):
+    # Polls that exist already keep whatever is_active says; the lifecycle only
+    # opens polls created ahead of their start_date from now on
+    Poll = apps.get_model("polls", "Poll")
+    Poll.objects.update(opened_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0007_vote_partitions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResultsSnapshot",
+            fields=[
+                (
+                    "poll",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="results_snapshot",
+                        serialize=False,
+                        to="polls.poll",
+                    ),
+                ),
+                ("results", models.JSONField()),
+                ("taken_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="poll",
+            name="closed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="poll",
+            name="opened_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_existing_opened, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="poll",
+            index=models.Index(
+                condition=models.Q(("end_date__isnull", False), ("is_active", True)),
+                fields=["end_date"],
+                name="poll_closing_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="poll",
+            index=models.Index(
+                condition=models.Q(("opened_at__isnull", True)),
+                fields=["start_date"],
+                name="poll_opening_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0008_poll_lifecycle"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FlushedVoteEntry",
+            fields=[
+                (
+                    "entry_id",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("flushed_at", models.DateTimeField()),
+            ],
+            options={
+                "verbose_name_plural": "flushed vote entries",
+            },
+        ),
+    ]
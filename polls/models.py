@@ -1,8 +1,9 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.urls import reverse
 from django.utils import timezone
-from voting_project.utils import generate_unique_slug
+from voting_project.utils import save_with_unique_slug
 from django_prometheus.models import ExportModelOperationsMixin
 
 
@@ -12,9 +13,10 @@ class Category(models.Model):
     description = models.TextField(blank=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = generate_unique_slug(self, self.name)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_unique_slug(self, self.name, super().save, *args, **kwargs)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -23,6 +25,34 @@ class Category(models.Model):
         return self.name
 
 
+class PollQuerySet(models.QuerySet):
+    def listed(self):
+        """Active polls that have at least one choice, newest first."""
+        has_choices = models.Exists(Choice.objects.filter(poll=models.OuterRef("pk")))
+        return (
+            self.filter(has_choices, is_active=True)
+            .select_related("category", "creator")
+            .order_by("-created_at", "-id")
+        )
+
+    def with_counts(self):
+        """Annotate choice_count and vote_count without touching Vote rows."""
+        choices = Choice.objects.filter(poll=models.OuterRef("pk")).order_by()
+        return self.annotate(
+            choice_count=models.Subquery(
+                choices.values("poll").annotate(n=models.Count("pk")).values("n")
+            ),
+            vote_count=Coalesce(
+                models.Subquery(
+                    choices.values("poll")
+                    .annotate(n=models.Sum("vote_count"))
+                    .values("n")
+                ),
+                0,
+            ),
+        )
+
+
 class Poll(ExportModelOperationsMixin("poll"), models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -41,15 +71,52 @@ class Poll(ExportModelOperationsMixin("poll"), models.Model):
         Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="polls"
     )
     slug = models.SlugField(unique=True, blank=True)
+    # Set by polls.lifecycle when the poll opens at start_date and closes at
+    # end_date. A poll created before its start_date waits inactive until then.
+    opened_at = models.DateTimeField(null=True, blank=True, editable=False)
+    closed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PollQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # PollListView / keyset pagination: active polls, newest first
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="poll_active_recent_idx",
+            ),
+            # polls.lifecycle: polls due to close, and polls due to open
+            models.Index(
+                fields=["end_date"],
+                condition=models.Q(is_active=True, end_date__isnull=False),
+                name="poll_closing_idx",
+            ),
+            models.Index(
+                fields=["start_date"],
+                condition=models.Q(opened_at__isnull=True),
+                name="poll_opening_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = generate_unique_slug(self, self.title)
-        super().save(*args, **kwargs)
+        if self._state.adding and self.opened_at is None:
+            if self.start_date <= timezone.now():
+                self.opened_at = timezone.now()
+            else:
+                self.is_active = False
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            save_with_unique_slug(self, self.title, super().save, *args, **kwargs)
 
     def get_absolute_url(self):
         return reverse("polls:poll_detail", kwargs={"slug": self.slug})
 
+    @property
+    def is_closed(self):
+        return not self.is_active and self.closed_at is not None
+
     def __str__(self):
         return self.title
 
@@ -59,9 +126,17 @@ class Choice(models.Model):
     choice_text = models.CharField(max_length=255)
     order = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Denormalized tally, bumped in the same transaction as each Vote insert
+    # and dropped when a Vote is deleted (polls.signals).
+    # Rebuild from Vote with `manage.py reconcile_vote_counts` if it drifts.
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["order"]
+        indexes = [
+            # A poll's choices in display order (results, detail, API)
+            models.Index(fields=["poll", "order"], name="choice_poll_order_idx"),
+        ]
 
     def __str__(self):
         return f"{self.poll.title} - {self.choice_text}"
@@ -80,12 +155,84 @@ class Vote(ExportModelOperationsMixin("vote"), models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     voted_at = models.DateTimeField(auto_now_add=True)
+    # Copied from `not poll.allow_multiple_votes` when the vote is cast. The
+    # duplicate-vote constraints below only apply to these rows.
+    enforce_unique = models.BooleanField(default=False, editable=False)
+    # Set when the poll is archived (see polls.archive). On PostgreSQL the
+    # table is partitioned on it, so live votes keep small indexes of their own.
+    archived = models.BooleanField(default=False, db_default=False, editable=False)
 
     class Meta:
-        unique_together = (
-            "poll",
-            "user",
-        )  # Basic prevention of duplicate voting by user
+        constraints = [
+            # One vote per user and poll, unless the poll allows more
+            models.UniqueConstraint(
+                fields=["poll", "user"],
+                condition=models.Q(enforce_unique=True, user__isnull=False),
+                name="vote_unique_user",
+            ),
+            # One anonymous vote per IP and poll, unless the poll allows more
+            models.UniqueConstraint(
+                fields=["poll", "ip_address"],
+                condition=models.Q(enforce_unique=True, user__isnull=True),
+                name="vote_unique_anon_ip",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} voted for {self.choice.choice_text}"
+
+
+class PollSummary(models.Model):
+    """Final tallies of an archived poll, frozen before its votes are moved."""
+
+    poll = models.OneToOneField(
+        Poll, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    total_votes = models.PositiveIntegerField()
+    # {choice id: votes}; JSON object keys are strings
+    tallies = models.JSONField()
+    first_vote_at = models.DateTimeField(null=True, blank=True)
+    last_vote_at = models.DateTimeField(null=True, blank=True)
+    frozen_at = models.DateTimeField(auto_now_add=True)
+    # Set once every vote has moved out of the live partition
+    votes_archived_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "poll summaries"
+
+    def __str__(self):
+        return f"{self.poll.title} ({self.total_votes} votes)"
+
+
+class ResultsSnapshot(models.Model):
+    """Results of a closed poll, as the results page shows them."""
+
+    poll = models.OneToOneField(
+        Poll,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="results_snapshot",
+    )
+    # polls.tallies.compute_results() output at close: choices and total_votes
+    results = models.JSONField()
+    taken_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Results of {self.poll.title}"
+
+
+class FlushedVoteEntry(models.Model):
+    """
+    A write-behind stream entry whose vote was flushed (polls.write_behind).
+    Recorded in the flush transaction and deleted once the entry is
+    acknowledged, so an entry redelivered after a crash is not flushed twice.
+    """
+
+    entry_id = models.CharField(max_length=64, primary_key=True)
+    flushed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = "flushed vote entries"
+
+    def __str__(self):
+        return self.entry_id
@@ -0,0 +1,170 @@
+"""
+Full-page cache for anonymous readers of the poll list, detail and results.
+
+Pages are stored under keys carrying the version of what they show (see
+``polls.results_cache``), so an edit or a vote makes the next request miss
+instead of serving a stale page:
+
+* detail pages use the poll's content version (poll and choice edits),
+* results pages use the poll's results version (also bumped by votes),
+* list pages use the list version, bumped by any poll or choice edit. Vote
+  counts on the cards are allowed to trail by ``PAGE_CACHE_TIMEOUT``.
+
+Only anonymous GETs without pending flash messages are served from or stored
+in the cache; signed-in users always get a fresh render. The CSRF token in a
+stored page belongs to whoever triggered the render, so it is replaced with
+the current visitor's token on the way out. Every response varies on Cookie,
+which keeps downstream caches from mixing signed-in and anonymous pages.
+
+``AsyncAnonymousPageCacheMixin`` does the same for the async views, whose
+``render_page()`` coroutine builds the response on a miss.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from .results_cache import (
+    aget_content_version,
+    aget_list_version,
+    aget_version,
+    get_content_version,
+    get_list_version,
+    get_version,
+)
+
+CSRF_INPUT = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def poll_id_key(slug):
+    return f"page:poll-id:{slug}"
+
+
+def page_key(scope, version, path):
+    digest = hashlib.md5(path.encode(), usedforsecurity=False).hexdigest()
+    return f"page:{scope}:v{version}:{digest}"
+
+
+def forget_poll(slug):
+    """Drop a deleted poll's slug mapping so a new poll can reuse the slug."""
+    cache.delete(poll_id_key(slug))
+
+
+def is_cacheable(request):
+    return (
+        request.method == "GET"
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def hit_response(request, content):
+    token = get_token(request)
+    content = CSRF_INPUT.sub(lambda m: m[1] + token + m[2], content)
+    response = HttpResponse(content)
+    response["X-Page-Cache"] = "hit"
+    patch_vary_headers(response, ["Cookie"])
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """Serve a view's anonymous GETs from the versioned page cache."""
+
+    # "list", "detail" or "results"
+    page_cache_scope = None
+
+    def page_version(self):
+        if self.page_cache_scope == "list":
+            return get_list_version()
+        # Slugs never change, so the slug -> id mapping lives until deletion
+        self.cached_poll_id = cache.get(poll_id_key(self.kwargs["slug"]))
+        if self.cached_poll_id is None:
+            return None
+        if self.page_cache_scope == "detail":
+            return get_content_version(self.cached_poll_id)
+        return get_version(self.cached_poll_id)
+
+    def get(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            response = super().get(request, *args, **kwargs)
+            patch_vary_headers(response, ["Cookie"])
+            return response
+
+        version = self.page_version()
+        key = None
+        if version is not None:
+            key = page_key(self.page_cache_scope, version, request.get_full_path())
+            content = cache.get(key)
+            if content is not None:
+                return hit_response(request, content)
+
+        response = super().get(request, *args, **kwargs)
+        entry = self.cache_entry(response, key)
+        if entry is not None:
+            cache.set(*entry)
+        response["X-Page-Cache"] = "miss"
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+    def cache_entry(self, response, key):
+        """Render a missed page and return the (key, value, timeout) to store."""
+        if response.status_code != 200:
+            return None
+        response.render()
+        if self.page_cache_scope != "list" and (self.cached_poll_id != self.object.pk):
+            # Unknown slug: remember its poll so the next visit can hit
+            return poll_id_key(self.object.slug), self.object.pk, None
+        if key is not None:
+            return key, response.content.decode(), settings.PAGE_CACHE_TIMEOUT
+        return None
+
+
+class AsyncAnonymousPageCacheMixin(AnonymousPageCacheMixin):
+    """
+    ``AnonymousPageCacheMixin`` for async views, through the async cache API.
+    Subclasses define ``async render_page(request, **kwargs)``, which loads
+    everything the page needs and returns the unrendered response.
+    """
+
+    async def apage_version(self):
+        if self.page_cache_scope == "list":
+            return await aget_list_version()
+        self.cached_poll_id = await cache.aget(poll_id_key(self.kwargs["slug"]))
+        if self.cached_poll_id is None:
+            return None
+        if self.page_cache_scope == "detail":
+            return await aget_content_version(self.cached_poll_id)
+        return await aget_version(self.cached_poll_id)
+
+    async def get(self, request, *args, **kwargs):
+        # Load the user, and with it the session, through the async ORM before
+        # anything reads request.user or the session-backed messages
+        request.user = await request.auser()
+        if not is_cacheable(request):
+            response = await self.render_page(request, *args, **kwargs)
+            # render_page() loads everything the templates touch, so rendering
+            # here runs no queries
+            response.render()
+            patch_vary_headers(response, ["Cookie"])
+            return response
+
+        version = await self.apage_version()
+        key = None
+        if version is not None:
+            key = page_key(self.page_cache_scope, version, request.get_full_path())
+            content = await cache.aget(key)
+            if content is not None:
+                return hit_response(request, content)
+
+        response = await self.render_page(request, *args, **kwargs)
+        entry = self.cache_entry(response, key)
+        if entry is not None:
+            await cache.aset(*entry)
+        response["X-Page-Cache"] = "miss"
+        patch_vary_headers(response, ["Cookie"])
+        return response
@@ -0,0 +1,159 @@
+"""
+Keyset (cursor) pagination over ``(created_at, id)``, newest first.
+
+Each page is a single indexed range scan of ``per_page + 1`` rows: no
+``COUNT(*)`` and no ``OFFSET``, so deep pages cost the same as the first.
+Cursors are opaque URL-safe tokens naming the row to continue from and the
+direction to walk in.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+# Primary keys are bigints; anything outside their range names no row
+MAX_PK = 2**63 - 1
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, obj):
+    payload = json.dumps([direction, obj.created_at.isoformat(), obj.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, created_at, pk = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(token)
+    if direction not in ("next", "prev") or created_at is None:
+        raise InvalidCursor(token)
+    if not -MAX_PK - 1 <= pk <= MAX_PK:
+        raise InvalidCursor(token)
+    return direction, created_at, pk
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginates a queryset ordered by ``-created_at, -id``."""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        queryset, direction = self._window(cursor)
+        return self._build(list(queryset), direction, cursor)
+
+    async def apage(self, cursor=None):
+        queryset, direction = self._window(cursor)
+        return self._build([row async for row in queryset], direction, cursor)
+
+    def _window(self, cursor):
+        """The slice of the queryset holding the page, plus one row to peek."""
+        queryset = self.queryset
+        direction = "next"
+        if cursor:
+            direction, created_at, pk = decode_cursor(cursor)
+            if direction == "next":
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by("created_at", "id")
+        return queryset[: self.per_page + 1], direction
+
+    def _build(self, rows, direction, cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if direction == "prev":
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        if not rows:
+            return KeysetPage([], None, None)
+        return KeysetPage(
+            rows,
+            encode_cursor("next", rows[-1]) if has_next else None,
+            encode_cursor("prev", rows[0]) if has_previous else None,
+        )
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class backed by ``KeysetPaginator``."""
+
+    page_size = 20
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        cursor = request.query_params.get(self.cursor_query_param)
+        try:
+            self.page = KeysetPaginator(queryset, self.page_size).page(cursor)
+        except InvalidCursor:
+            raise NotFound("Invalid cursor.")
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self._link(self.page.next_cursor),
+                "previous": self._link(self.page.previous_cursor),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,188 @@
+"""
+Versioned cache for poll results.
+
+Entries are stored under ``results:<slug>:v<version>``. Any change to a poll,
+its choices or its votes bumps the poll's version (see ``polls.signals``),
+so stale entries are never read again and simply expire.
+
+On a miss a single request recomputes the results while holding a short
+lock; concurrent requests keep serving the previous version for up to
+``RESULTS_CACHE_STALE_SECONDS`` instead of piling onto the database.
+
+Two more versions track changes to what polls say rather than their tallies:
+a per-poll content version and a list version, both bumped only when a poll
+or its choices change. ``polls.page_cache`` keys pages on them.
+
+The ``a``-prefixed functions are the same reads for async views; they only
+use the cache's async API.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+LOCK_TIMEOUT = 10
+
+_local = threading.local()
+
+
+def version_key(poll_id):
+    return f"results:version:{poll_id}"
+
+
+def entry_key(slug, version):
+    return f"results:{slug}:v{version}"
+
+
+def latest_key(slug):
+    return f"results:{slug}:latest"
+
+
+def lock_key(slug, version):
+    return f"results:{slug}:v{version}:lock"
+
+
+def content_version_key(poll_id):
+    return f"polls:content-version:{poll_id}"
+
+
+LIST_VERSION_KEY = "polls:list-version"
+
+
+def read_counter(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old versions
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aread_counter(key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_counter(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_version(poll_id):
+    return read_counter(version_key(poll_id))
+
+
+def get_content_version(poll_id):
+    return read_counter(content_version_key(poll_id))
+
+
+def get_list_version():
+    return read_counter(LIST_VERSION_KEY)
+
+
+async def aget_version(poll_id):
+    return await aread_counter(version_key(poll_id))
+
+
+async def aget_content_version(poll_id):
+    return await aread_counter(content_version_key(poll_id))
+
+
+async def aget_list_version():
+    return await aread_counter(LIST_VERSION_KEY)
+
+
+def bump_version(poll_id):
+    bump_counter(version_key(poll_id))
+
+
+def invalidate_poll(poll_id, content=False):
+    """
+    Bump the poll's version once the current transaction commits. With
+    ``content``, the poll or its choices changed: bump the content and list
+    versions too.
+    """
+    pending = getattr(_local, "polls", None)
+    if pending is None:
+        pending = _local.polls = {}
+    pending[poll_id] = pending.get(poll_id, False) or content
+    transaction.on_commit(lambda: _bump_pending(poll_id))
+
+
+def _bump_pending(poll_id):
+    # A cascade delete queues one callback per row; only the first one bumps
+    if poll_id in _local.polls:
+        content = _local.polls.pop(poll_id)
+        bump_version(poll_id)
+        if content:
+            bump_counter(content_version_key(poll_id))
+            bump_counter(LIST_VERSION_KEY)
+
+
+def get_results(poll, compute):
+    """Return cached results for ``poll``, calling ``compute(poll)`` on a miss."""
+    version = get_version(poll.pk)
+    results = cache.get(entry_key(poll.slug, version))
+    if results is not None:
+        return results
+
+    lock = lock_key(poll.slug, version)
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            results = compute(poll)
+            cache.set_many(
+                {
+                    entry_key(poll.slug, version): results,
+                    latest_key(poll.slug): (time.time(), results),
+                },
+                settings.RESULTS_CACHE_TIMEOUT,
+            )
+        finally:
+            cache.delete(lock)
+        return results
+
+    # Someone else is recomputing: serve the last known results if recent
+    latest = cache.get(latest_key(poll.slug))
+    if latest is not None:
+        computed_at, results = latest
+        if time.time() - computed_at < settings.RESULTS_CACHE_STALE_SECONDS:
+            return results
+    return compute(poll)
+
+
+async def aget_results(poll, compute):
+    """``get_results`` for async views; ``compute`` is a coroutine function."""
+    version = await aget_version(poll.pk)
+    results = await cache.aget(entry_key(poll.slug, version))
+    if results is not None:
+        return results
+
+    lock = lock_key(poll.slug, version)
+    if await cache.aadd(lock, 1, LOCK_TIMEOUT):
+        try:
+            results = await compute(poll)
+            await cache.aset_many(
+                {
+                    entry_key(poll.slug, version): results,
+                    latest_key(poll.slug): (time.time(), results),
+                },
+                settings.RESULTS_CACHE_TIMEOUT,
+            )
+        finally:
+            await cache.adelete(lock)
+        return results
+
+    latest = await cache.aget(latest_key(poll.slug))
+    if latest is not None:
+        computed_at, results = latest
+        if time.time() - computed_at < settings.RESULTS_CACHE_STALE_SECONDS:
+            return results
+    return await compute(poll)
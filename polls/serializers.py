@@ -0,0 +1,70 @@
+from rest_framework import serializers
+from .models import Choice, Poll
+
+
+class PollBaseSerializer(serializers.ModelSerializer):
+    category = serializers.CharField(source="category.name", default=None)
+    creator = serializers.CharField(source="creator.username")
+
+
+class PollListSerializer(PollBaseSerializer):
+    choice_count = serializers.IntegerField(read_only=True)
+    vote_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Poll
+        fields = [
+            "slug",
+            "title",
+            "description",
+            "category",
+            "creator",
+            "created_at",
+            "end_date",
+            "choice_count",
+            "vote_count",
+        ]
+
+
+class ChoiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Choice
+        fields = ["id", "choice_text"]
+
+
+class PollDetailSerializer(PollBaseSerializer):
+    choices = ChoiceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Poll
+        fields = [
+            "slug",
+            "title",
+            "description",
+            "category",
+            "creator",
+            "created_at",
+            "start_date",
+            "end_date",
+            "is_active",
+            "is_public",
+            "allow_multiple_votes",
+            "choices",
+        ]
+
+
+class VoteSerializer(serializers.Serializer):
+    choice = serializers.IntegerField()
+
+
+class ChoiceResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    choice_text = serializers.CharField()
+    vote_count = serializers.IntegerField()
+    percentage = serializers.FloatField()
+
+
+class PollResultsSerializer(serializers.Serializer):
+    poll = serializers.CharField()
+    total_votes = serializers.IntegerField()
+    choices = ChoiceResultSerializer(many=True)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Choice, Poll, Vote
+from .page_cache import forget_poll
+from .results_cache import invalidate_poll
+from . import reach, voter_filter
+
+
+@receiver([post_save, post_delete], sender=Poll)
+def invalidate_poll_results(sender, instance, **kwargs):
+    invalidate_poll(instance.pk, content=True)
+
+
+@receiver(post_delete, sender=Poll)
+def forget_deleted_poll(sender, instance, **kwargs):
+    forget_poll(instance.slug)
+    if settings.VOTER_FILTER:
+        voter_filter.forget(instance.slug)
+    if settings.REACH_ANALYTICS:
+        reach.forget_poll(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def invalidate_parent_poll_content(sender, instance, **kwargs):
+    invalidate_poll(instance.poll_id, content=True)
+
+
+@receiver([post_save, post_delete], sender=Vote)
+def invalidate_parent_poll_results(sender, instance, **kwargs):
+    invalidate_poll(instance.poll_id)
+
+
+@receiver(post_delete, sender=Vote)
+def uncount_deleted_vote(sender, instance, **kwargs):
+    # Admin deletes and cascades from deleted users; the version bump above
+    # drops the cached results
+    Choice.objects.filter(pk=instance.choice_id, vote_count__gt=0).update(
+        vote_count=F("vote_count") - 1
+    )
@@ -0,0 +1,88 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from voting_project.instrumentation import stage
+from .models import Choice, Vote
+from . import write_behind
+
+
+def record_vote(poll, choice, **vote_fields):
+    """Insert a Vote and bump its choice's counter in one transaction."""
+    with transaction.atomic():
+        vote = Vote.objects.create(
+            poll=poll,
+            choice=choice,
+            enforce_unique=not poll.allow_multiple_votes,
+            **vote_fields,
+        )
+        Choice.objects.filter(pk=choice.pk).update(vote_count=F("vote_count") + 1)
+    return vote
+
+
+def counted_choices():
+    """
+    Choices whose counters follow Vote. An archived poll's were frozen with its
+    PollSummary, and its votes may since have been detached.
+    """
+    return Choice.objects.filter(poll__summary__isnull=True)
+
+
+def rebuild_vote_counts(choices=None):
+    """Recompute Choice.vote_count from Vote rows. Returns rows updated."""
+    if choices is None:
+        choices = counted_choices()
+    counts = (
+        Vote.objects.filter(choice=OuterRef("pk"))
+        .order_by()
+        .values("choice")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return choices.update(vote_count=Coalesce(Subquery(counts), 0))
+
+
+def find_drift(choices=None):
+    """Yield (choice, stored, actual) for every counter out of sync with Vote."""
+    if choices is None:
+        choices = counted_choices()
+    annotated = choices.select_related("poll").annotate(actual=Count("votes"))
+    for choice in annotated:
+        if choice.vote_count != choice.actual:
+            yield choice, choice.vote_count, choice.actual
+
+
+def compute_results(poll):
+    """Per-choice counts and percentages for the results page."""
+    with stage("results", "aggregate"):
+        choices = list(poll.choices.values("id", "choice_text", "vote_count"))
+        if settings.VOTE_WRITE_BEHIND:
+            pending = write_behind.pending_counts(poll)
+            for choice in choices:
+                choice["vote_count"] += pending[choice["id"]]
+    return with_percentages(choices)
+
+
+async def acompute_results(poll):
+    """``compute_results`` for async views."""
+    with stage("results", "aggregate"):
+        queryset = poll.choices.values("id", "choice_text", "vote_count")
+        choices = [choice async for choice in queryset.aiterator()]
+        if settings.VOTE_WRITE_BEHIND:
+            pending = await sync_to_async(write_behind.pending_counts)(poll)
+            for choice in choices:
+                choice["vote_count"] += pending[choice["id"]]
+    return with_percentages(choices)
+
+
+def with_percentages(choices):
+    total_votes = sum(c["vote_count"] for c in choices)
+
+    for choice in choices:
+        if total_votes > 0:
+            choice["percentage"] = (choice["vote_count"] / total_votes) * 100
+        else:
+            choice["percentage"] = 0
+
+    return {"choices": choices, "total_votes": total_votes}
@@ -0,0 +1,27 @@
+from celery import shared_task
+from . import archive, lifecycle, live
+from .write_behind import flush_stream
+
+
+@shared_task(ignore_result=True)
+def flush_vote_stream(batch_size=None):
+    """Bulk-insert votes accepted in write-behind mode into Postgres."""
+    return flush_stream(batch_size)
+
+
+@shared_task(ignore_result=True)
+def broadcast_results(poll_id):
+    """Push coalesced tally deltas for a poll to its WebSocket watchers."""
+    return live.broadcast(poll_id)
+
+
+@shared_task(ignore_result=True)
+def run_poll_lifecycle():
+    """Open and close the polls whose start or end date has come."""
+    return lifecycle.run_lifecycle()
+
+
+@shared_task(ignore_result=True)
+def archive_polls():
+    """Freeze newly archived polls and move their votes to the archive."""
+    return archive.archive_polls()
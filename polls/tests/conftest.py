@@ -0,0 +1,21 @@
+import pytest
+from django.contrib.auth import get_user_model
+from polls.models import Choice, Poll
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create_user(
+        "creator", email="creator@example.com", password="secret"
+    )
+
+
+@pytest.fixture
+def make_poll(user):
+    def make_poll(title="Favourite colour", choices=("Red", "Blue"), **fields):
+        poll = Poll.objects.create(title=title, creator=user, **fields)
+        for text in choices:
+            Choice.objects.create(poll=poll, choice_text=text)
+        return poll
+
+    return make_poll
@@ -0,0 +1,35 @@
+from django.urls import reverse
+from polls.tallies import record_vote
+
+
+def test_detail_etag_survives_votes_but_not_edits(
+    client, make_poll, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        poll = make_poll()
+    url = reverse("api:poll_detail", args=[poll.slug])
+    etag = client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        poll.title = "Renamed"
+        poll.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["title"] == "Renamed"
+
+
+def test_results_etag_changes_with_votes(
+    client, make_poll, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        poll = make_poll()
+    url = reverse("api:poll_results", args=[poll.slug])
+    etag = client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
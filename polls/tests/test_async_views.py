@@ -0,0 +1,69 @@
+import pytest
+from django.urls import include, path, reverse
+from polls import async_views
+from polls import urls as polls_urls
+from polls.tallies import record_vote
+from voting_project import urls as project_urls
+
+ASYNC_VIEWS = {
+    "poll_list": async_views.AsyncPollListView,
+    "poll_detail": async_views.AsyncPollDetailView,
+    "poll_results": async_views.AsyncPollResultsView,
+}
+polls_patterns = [
+    (
+        path(str(p.pattern), ASYNC_VIEWS[p.name].as_view(), name=p.name)
+        if p.name in ASYNC_VIEWS
+        else p
+    )
+    for p in polls_urls.urlpatterns
+]
+# The project's URLs with the async read views, as ASYNC_READ_VIEWS routes them
+urlpatterns = [
+    *project_urls.urlpatterns[:-1],
+    path("", include((polls_patterns, "polls"))),
+]
+
+pytestmark = pytest.mark.urls(__name__)
+
+
+def test_poll_pages_render(client, make_poll):
+    poll = make_poll()
+    record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+
+    assert poll.title in client.get(reverse("polls:poll_list")).content.decode()
+    detail = client.get(reverse("polls:poll_detail", args=[poll.slug]))
+    assert "Blue" in detail.content.decode()
+    results = client.get(reverse("polls:poll_results", args=[poll.slug]))
+    assert results.context["total_votes"] == 1
+    assert results.resolver_match.func.view_class is async_views.AsyncPollResultsView
+
+
+def test_anonymous_pages_are_cached(client, make_poll):
+    poll = make_poll()
+    url = reverse("polls:poll_detail", args=[poll.slug])
+    assert [client.get(url)["X-Page-Cache"] for _ in range(3)] == [
+        "miss",
+        "miss",
+        "hit",
+    ]
+
+
+def test_signed_in_pages_render_without_lazy_queries(client, user, make_poll):
+    client.force_login(user)
+    poll = make_poll()
+    response = client.get(reverse("polls:poll_detail", args=[poll.slug]))
+    assert response.status_code == 200
+    assert "X-Page-Cache" not in response
+
+
+def test_unknown_poll_is_not_found(client, db):
+    assert (
+        client.get(reverse("polls:poll_results", args=["missing"])).status_code == 404
+    )
+
+
+def test_invalid_cursor_is_not_found(client, settings, db):
+    settings.POLL_LIST_PAGINATION = "cursor"
+    response = client.get(reverse("polls:poll_list"), {"cursor": "nope"})
+    assert response.status_code == 404
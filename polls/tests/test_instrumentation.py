@@ -0,0 +1,47 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from voting_project import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def reset_mode():
+    yield
+    instrumentation.set_mode(None)
+
+
+def insert_count():
+    value = REGISTRY.get_sample_value(
+        "polls_stage_duration_seconds_count", {"pipeline": "vote", "stage": "insert"}
+    )
+    return value or 0
+
+
+def vote(client, poll):
+    client.post(
+        reverse("polls:poll_vote", args=[poll.slug]),
+        {"choice": poll.choices.first().pk},
+    )
+
+
+def test_votes_are_timed_by_stage(client, user, make_poll):
+    client.force_login(user)
+    before = insert_count()
+    vote(client, make_poll())
+    assert insert_count() == before + 1
+
+
+def test_minimal_mode_skips_the_stage_histograms(client, user, make_poll):
+    client.force_login(user)
+    call_command("instrumentation", "minimal", stdout=StringIO())
+    assert not instrumentation.enabled()
+
+    before = insert_count()
+    vote(client, make_poll())
+    assert insert_count() == before
+
+    call_command("instrumentation", "--reset", stdout=StringIO())
+    assert instrumentation.enabled()
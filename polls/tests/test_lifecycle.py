@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+from polls.lifecycle import run_lifecycle
+from polls.models import Choice, Poll, ResultsSnapshot
+from polls.tasks import run_poll_lifecycle
+from polls.tallies import record_vote
+
+
+def test_polls_open_and_close_on_schedule(make_poll):
+    now = timezone.now()
+    poll = make_poll(
+        start_date=now + timedelta(hours=1), end_date=now + timedelta(hours=2)
+    )
+    assert not poll.is_active and poll.opened_at is None
+
+    run_poll_lifecycle.apply().get()
+    poll.refresh_from_db()
+    assert not poll.is_active
+
+    Poll.objects.filter(pk=poll.pk).update(start_date=now - timedelta(minutes=1))
+    run_poll_lifecycle.apply().get()
+    poll.refresh_from_db()
+    assert poll.is_active and poll.opened_at is not None
+
+    Poll.objects.filter(pk=poll.pk).update(end_date=now - timedelta(seconds=1))
+    run_poll_lifecycle.apply().get()
+    poll.refresh_from_db()
+    assert poll.is_closed
+
+
+def test_closed_poll_results_come_from_the_snapshot(client, make_poll):
+    poll = make_poll(end_date=timezone.now() + timedelta(hours=1))
+    red = poll.choices.first()
+    record_vote(poll, red, ip_address="203.0.113.7")
+    run_lifecycle(now=poll.end_date)
+    snapshot = ResultsSnapshot.objects.get(poll=poll)
+    assert snapshot.results["total_votes"] == 1
+
+    # Counters are no longer read for a closed poll
+    Choice.objects.filter(pk=red.pk).update(vote_count=99)
+    response = client.get(reverse("polls:poll_results", args=[poll.slug]))
+    assert response.context["total_votes"] == 1
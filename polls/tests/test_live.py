@@ -0,0 +1,78 @@
+import pytest
+from kombu.exceptions import OperationalError
+from polls import live
+from polls.tallies import record_vote
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FakeChannelLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, message):
+        self.sent.append(message)
+
+
+def broker_down(*args, **kwargs):
+    raise OperationalError("broker unreachable")
+
+
+@pytest.fixture
+def channel_layer(monkeypatch):
+    layer = FakeChannelLayer()
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(live, "get_redis", lambda: client)
+    monkeypatch.setattr(live, "get_channel_layer", lambda: layer)
+    return layer
+
+
+def test_snapshot_leaves_out_votes_of_the_next_delta(
+    channel_layer, make_poll, monkeypatch
+):
+    from polls.tasks import broadcast_results
+
+    monkeypatch.setattr(broadcast_results, "apply_async", broker_down)
+    poll = make_poll()
+    red = poll.choices.first()
+    record_vote(poll, red, ip_address="203.0.113.7")
+    live.publish_vote(poll.pk, red.pk)
+
+    results, sequence = live.snapshot(poll)
+    assert sequence == 0
+    assert {c["id"]: c["vote_count"] for c in results["choices"]}[red.pk] == 0
+
+    assert live.broadcast(poll.pk) == 1
+    assert channel_layer.sent[-1]["seq"] == 1
+    assert channel_layer.sent[-1]["deltas"] == {str(red.pk): 1}
+
+    results, sequence = live.snapshot(poll)
+    assert sequence == 1
+    assert {c["id"]: c["vote_count"] for c in results["choices"]}[red.pk] == 1
+
+
+def test_snapshot_counts_votes_published_while_counting(
+    channel_layer, make_poll, monkeypatch
+):
+    from polls.tasks import broadcast_results
+
+    monkeypatch.setattr(broadcast_results, "apply_async", broker_down)
+    poll = make_poll()
+    red = poll.choices.first()
+    count = live.compute_results
+
+    def count_then_vote(poll):
+        results = count(poll)
+        if not red.votes.exists():
+            # Committed after the count, published before the hash is read
+            record_vote(poll, red, ip_address="203.0.113.7")
+            live.publish_vote(poll.pk, red.pk)
+        return results
+
+    monkeypatch.setattr(live, "compute_results", count_then_vote)
+    results, sequence = live.snapshot(poll)
+    live.broadcast(poll.pk)
+
+    [delta] = [m for m in channel_layer.sent if m["seq"] > sequence]
+    snapshot_count = {c["id"]: c["vote_count"] for c in results["choices"]}[red.pk]
+    assert snapshot_count + delta["deltas"][str(red.pk)] == 1
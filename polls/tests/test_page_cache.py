@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from polls.tallies import record_vote
+
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]*)"')
+
+
+@pytest.fixture
+def poll(make_poll, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return make_poll()
+
+
+def page_cache(client, url):
+    return client.get(url).get("X-Page-Cache")
+
+
+def test_anonymous_results_are_cached_until_a_vote(
+    client, poll, django_capture_on_commit_callbacks
+):
+    url = reverse("polls:poll_results", args=[poll.slug])
+    # The first visit maps the slug to its poll, the second stores the page
+    assert [page_cache(client, url) for _ in range(3)] == ["miss", "miss", "hit"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+
+    assert page_cache(client, url) == "miss"
+    assert page_cache(client, url) == "hit"
+
+
+def test_signed_in_users_are_never_served_from_the_cache(client, user, poll):
+    url = reverse("polls:poll_detail", args=[poll.slug])
+    for _ in range(3):
+        page_cache(client, url)
+
+    client.force_login(user)
+    response = client.get(url)
+    assert "X-Page-Cache" not in response
+    assert "Cookie" in response["Vary"]
+
+
+def test_cached_detail_page_carries_the_visitors_csrf_token(poll):
+    url = reverse("polls:poll_detail", args=[poll.slug])
+    for _ in range(2):
+        Client().get(url)
+
+    visitor = Client(enforce_csrf_checks=True)
+    response = visitor.get(url)
+    assert response["X-Page-Cache"] == "hit"
+    token = CSRF_TOKEN.search(response.content.decode())[1]
+    vote = visitor.post(
+        reverse("polls:poll_vote", args=[poll.slug]),
+        {"choice": poll.choices.first().pk, "csrfmiddlewaretoken": token},
+        REMOTE_ADDR="203.0.113.7",
+    )
+    assert vote.status_code == 302
+
+
+def test_choice_edits_reach_the_choices_fragment(
+    client, user, poll, django_capture_on_commit_callbacks
+):
+    client.force_login(user)
+    url = reverse("polls:poll_detail", args=[poll.slug])
+    assert "Red" in client.get(url).content.decode()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        red = poll.choices.get(choice_text="Red")
+        red.choice_text = "Green"
+        red.save()
+
+    content = client.get(url).content.decode()
+    assert "Green" in content and "Red" not in content
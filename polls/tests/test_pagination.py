@@ -0,0 +1,39 @@
+import base64
+import json
+
+import pytest
+from django.urls import reverse
+from polls.pagination import InvalidCursor, decode_cursor
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+MALFORMED = [
+    "not a cursor",
+    cursor(["next", "2024-01-01T00:00:00+00:00", "abc"]),
+    cursor(["next", "2024-01-01T00:00:00+00:00", None]),
+    cursor(["next", "2024-01-01T00:00:00+00:00", 99999999999999999999999]),
+    cursor(["next", 5, 1]),
+    cursor(["sideways", "2024-01-01T00:00:00+00:00", 1]),
+]
+
+
+@pytest.mark.parametrize("token", MALFORMED)
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("token", MALFORMED)
+def test_malformed_cursors_are_not_found(client, settings, token):
+    settings.POLL_LIST_PAGINATION = "cursor"
+    response = client.get(reverse("polls:poll_list"), {"cursor": token})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("token", MALFORMED)
+def test_malformed_api_cursors_are_not_found(client, token):
+    response = client.get(reverse("api:poll_list"), {"cursor": token})
+    assert response.status_code == 404
@@ -0,0 +1,19 @@
+import pytest
+from django.urls import reverse
+from polls.views import PollListView
+
+
+@pytest.mark.parametrize("page_size", [1, 5, 20])
+def test_poll_list_query_count_is_constant(
+    client, make_poll, monkeypatch, django_assert_num_queries, page_size
+):
+    for number in range(20):
+        make_poll(title=f"Poll {number}")
+    monkeypatch.setattr(PollListView, "paginate_by", page_size)
+
+    # COUNT(*) for the paginator, then the page itself with its counts
+    with django_assert_num_queries(2):
+        response = client.get(reverse("polls:poll_list"))
+
+    assert response.status_code == 200
+    assert len(response.context["polls"]) == page_size
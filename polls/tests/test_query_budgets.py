@@ -0,0 +1,47 @@
+import pytest
+from django.urls import reverse
+from polls.management.commands.query_report import read_records
+from prometheus_client import REGISTRY
+from voting_project.middleware import QueryBudgetExceeded
+
+
+def test_view_over_budget_raises_in_tests(client, settings, make_poll):
+    make_poll()
+    settings.QUERY_BUDGETS = {"polls:poll_list": 1}
+    with pytest.raises(QueryBudgetExceeded, match="polls:poll_list ran 2 queries"):
+        client.get(reverse("polls:poll_list"))
+
+
+def test_view_over_budget_is_counted_in_warn_mode(client, settings, make_poll):
+    make_poll()
+    settings.QUERY_BUDGETS = {"polls:poll_list": 1}
+    settings.QUERY_BUDGET_MODE = "warn"
+    settings.QUERY_STATS_HEADERS = True
+    labels = {"view": "polls:poll_list"}
+    before = REGISTRY.get_sample_value("query_budget_exceeded_total", labels) or 0
+
+    response = client.get(reverse("polls:poll_list"))
+
+    assert response.status_code == 200
+    assert response["X-DB-Queries"] == "2"
+    assert REGISTRY.get_sample_value("query_budget_exceeded_total", labels) == (
+        before + 1
+    )
+
+
+@pytest.mark.parametrize(
+    "name", ["polls:poll_detail", "polls:poll_results", "api:poll_detail"]
+)
+def test_poll_pages_stay_within_budget(client, make_poll, name):
+    poll = make_poll()
+    assert client.get(reverse(name, args=[poll.slug])).status_code == 200
+
+
+def test_query_report_reads_only_query_records():
+    lines = [
+        "INFO booting worker",
+        '2026-10-18 INFO {"event": "db_queries", "view": "polls:poll_list"}',
+        'WARNING {"event": "other"}',
+        "ERROR {not json",
+    ]
+    assert [r["view"] for r in read_records(lines)] == ["polls:poll_list"]
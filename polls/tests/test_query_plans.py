@@ -0,0 +1,13 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.mark.django_db
+def test_hot_views_use_indexes(make_poll):
+    if connection.vendor != "postgresql":
+        pytest.skip("EXPLAIN checks only run against PostgreSQL")
+    make_poll()
+
+    # Raises CommandError on any Seq Scan of the tables behind the views
+    call_command("explain_views")
@@ -0,0 +1,50 @@
+import pytest
+from django.urls import reverse
+from polls import reach
+from polls.models import Category
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(reach, "get_redis", lambda: client)
+    return client
+
+
+def test_votes_run_no_queries(redis_client, make_poll, django_assert_num_queries):
+    poll = make_poll()
+    with django_assert_num_queries(0):
+        reach.record_vote(poll.pk, ip_address="203.0.113.7")
+    assert reach.poll_reach(poll.pk) == {"voters": 1, "ips": 1}
+
+
+def test_category_gauges_are_computed_on_scrape(redis_client, make_poll, client):
+    category = Category.objects.create(name="Colours")
+    first = make_poll(category=category)
+    second = make_poll(title="Second colour", category=category)
+    reach.record_vote(first.pk, ip_address="203.0.113.7")
+    reach.record_vote(second.pk, ip_address="203.0.113.7")
+    reach.record_vote(second.pk, ip_address="203.0.113.8")
+
+    metrics = client.get(reverse("prometheus-django-metrics")).content.decode()
+
+    assert 'category_unique_voters{category="colours"} 2.0' in metrics
+    assert 'category_unique_ips{category="colours"} 2.0' in metrics
+
+
+def test_scrapes_reuse_cached_category_totals(
+    redis_client, make_poll, django_assert_num_queries
+):
+    category = Category.objects.create(name="Colours")
+    poll = make_poll(category=category)
+    reach.record_vote(poll.pk, ip_address="203.0.113.7")
+    collector = reach.CategoryReachCollector()
+    collector.collect()
+
+    reach.record_vote(poll.pk, ip_address="203.0.113.8")
+    with django_assert_num_queries(0):
+        voters, ips = collector.collect()
+
+    assert [sample.value for sample in voters.samples] == [1]
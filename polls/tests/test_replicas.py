@@ -0,0 +1,62 @@
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.views import View
+from voting_project.middleware import ReplicaRoutingMiddleware
+from voting_project.replicas import ReplicaReadMixin, ReplicaRouter
+
+router = ReplicaRouter()
+
+
+class ReadView(ReplicaReadMixin, View):
+    """Reports where a read would go; POSTs write."""
+
+    def get(self, request):
+        return HttpResponse(router.db_for_read(None))
+
+    def post(self, request):
+        router.db_for_write(None)
+        return HttpResponse(router.db_for_read(None))
+
+
+@pytest.fixture
+def app(settings):
+    settings.READ_REPLICAS = ["replica1"]
+    return ReplicaRoutingMiddleware(ReadView.as_view())
+
+
+def read_from(response):
+    return response.content.decode()
+
+
+def test_reads_go_to_a_replica(app, settings):
+    response = app(RequestFactory().get("/"))
+    assert read_from(response) == "replica1"
+    assert settings.REPLICA_STICKY_COOKIE not in response.cookies
+
+
+def test_writes_pin_the_visitor_to_the_primary(app, settings):
+    response = app(RequestFactory().post("/"))
+    # Read after write in the same request
+    assert read_from(response) == "default"
+    cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+    assert cookie["max-age"] == settings.REPLICA_STICKY_SECONDS
+
+    request = RequestFactory().get("/")
+    request.COOKIES[settings.REPLICA_STICKY_COOKIE] = cookie.value
+    assert read_from(app(request)) == "default"
+
+
+def test_reads_outside_replica_views_use_the_primary(settings):
+    settings.READ_REPLICAS = ["replica1"]
+    app = ReplicaRoutingMiddleware(
+        lambda request: HttpResponse(router.db_for_read(None))
+    )
+    assert read_from(app(RequestFactory().get("/"))) == "default"
+
+
+def test_no_replicas_leaves_the_middleware_out(settings):
+    settings.READ_REPLICAS = []
+    with pytest.raises(MiddlewareNotUsed):
+        ReplicaRoutingMiddleware(ReadView.as_view())
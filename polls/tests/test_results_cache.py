@@ -0,0 +1,69 @@
+import pytest
+from django.core.cache import cache
+from polls import results_cache
+from polls.tallies import compute_results, record_vote
+
+
+@pytest.fixture
+def poll(make_poll, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return make_poll()
+
+
+def counting(calls):
+    def compute(poll):
+        calls.append(poll.pk)
+        return compute_results(poll)
+
+    return compute
+
+
+def red_votes(results):
+    return results["choices"][0]["vote_count"]
+
+
+def test_votes_bump_the_version_and_miss_the_cache(
+    poll, django_capture_on_commit_callbacks
+):
+    calls = []
+    version = results_cache.get_version(poll.pk)
+    assert red_votes(results_cache.get_results(poll, counting(calls))) == 0
+    assert red_votes(results_cache.get_results(poll, counting(calls))) == 0
+    assert len(calls) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+
+    assert results_cache.get_version(poll.pk) != version
+    assert red_votes(results_cache.get_results(poll, counting(calls))) == 1
+    assert len(calls) == 2
+
+
+def test_votes_leave_the_content_version_alone(
+    poll, django_capture_on_commit_callbacks
+):
+    content = results_cache.get_content_version(poll.pk)
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+    assert results_cache.get_content_version(poll.pk) == content
+
+    with django_capture_on_commit_callbacks(execute=True):
+        poll.title = "Renamed"
+        poll.save()
+    assert results_cache.get_content_version(poll.pk) != content
+
+
+def test_stampede_serves_the_latest_results_while_locked(
+    poll, django_capture_on_commit_callbacks
+):
+    calls = []
+    results_cache.get_results(poll, counting(calls))
+    with django_capture_on_commit_callbacks(execute=True):
+        record_vote(poll, poll.choices.first(), ip_address="203.0.113.7")
+
+    # Another request is recomputing the new version
+    version = results_cache.get_version(poll.pk)
+    cache.add(results_cache.lock_key(poll.slug, version), 1)
+
+    assert red_votes(results_cache.get_results(poll, counting(calls))) == 0
+    assert len(calls) == 1
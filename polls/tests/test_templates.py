@@ -0,0 +1,46 @@
+import pytest
+from django.conf import settings as project_settings
+from django.template import engines
+from django.urls import reverse
+from voting_project.rendering import warm_templates
+
+JINJA2 = {
+    "BACKEND": "django.template.backends.jinja2.Jinja2",
+    "DIRS": [project_settings.BASE_DIR / "jinja2"],
+    "OPTIONS": {
+        "environment": "voting_project.rendering.environment",
+        "context_processors": project_settings.TEMPLATE_CONTEXT_PROCESSORS,
+    },
+}
+
+
+def test_warmup_fills_the_cached_loader():
+    html = list((project_settings.BASE_DIR / "templates").rglob("*.html"))
+    [loader] = engines["django"].engine.template_loaders
+
+    assert warm_templates() == len(html)
+    assert "polls/poll_detail.html" in loader.get_template_cache
+
+
+@pytest.fixture
+def jinja2_pages(settings):
+    settings.TEMPLATES = [JINJA2, *settings.TEMPLATES]
+
+
+@pytest.mark.parametrize("name", ["polls:poll_detail", "polls:poll_results"])
+def test_jinja2_renders_the_poll_pages(client, make_poll, jinja2_pages, name):
+    poll = make_poll()
+    response = client.get(reverse(name, args=[poll.slug]))
+
+    assert response.status_code == 200
+    # Only Django templates are recorded here
+    assert response.templates == []
+    content = response.content.decode()
+    assert poll.title in content and "Red" in content
+
+
+def test_jinja2_renders_the_poll_list(client, make_poll, jinja2_pages):
+    make_poll()
+    response = client.get(reverse("polls:poll_list"))
+    assert response.status_code == 200
+    assert "Favourite colour" in response.content.decode()
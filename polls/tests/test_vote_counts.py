@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from polls.tallies import record_vote
+
+
+def test_deleting_votes_drops_the_counters(make_poll):
+    poll = make_poll()
+    red, blue = poll.choices.all()
+    voter = get_user_model().objects.create_user("voter", email="voter@example.com")
+    record_vote(poll, red, user=voter)
+    anonymous = record_vote(poll, red, ip_address="203.0.113.7")
+    record_vote(poll, blue, ip_address="203.0.113.8")
+
+    anonymous.delete()
+    voter.delete()
+
+    red.refresh_from_db()
+    blue.refresh_from_db()
+    assert (red.vote_count, blue.vote_count) == (0, 1)
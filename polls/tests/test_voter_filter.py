@@ -0,0 +1,63 @@
+import pytest
+from polls import voter_filter
+from polls.models import Vote
+from polls.voting import VoteRejected, cast_vote
+from prometheus_client import REGISTRY
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client(monkeypatch, settings):
+    settings.REACH_ANALYTICS = False
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(voter_filter, "get_redis", lambda: client)
+    return client
+
+
+def check_count(outcome):
+    labels = {"outcome": outcome}
+    return REGISTRY.get_sample_value("voter_filter_checks_total", labels) or 0
+
+
+def test_deleted_poll_filter_is_not_inherited(redis_client, make_poll):
+    poll = make_poll()
+    voter_filter.add(poll.slug, "203.0.113.7")
+    assert voter_filter.might_contain(poll.slug, "203.0.113.7")
+
+    slug = poll.slug
+    poll.delete()
+    reused = make_poll(slug=slug)
+
+    assert reused.slug == slug
+    assert not voter_filter.might_contain(slug, "203.0.113.7")
+
+
+def test_repeat_anonymous_voter_is_refused_without_an_insert(
+    redis_client, make_poll, django_assert_num_queries
+):
+    poll = make_poll()
+    red = poll.choices.first()
+    cast_vote(poll.slug, red.pk, ip_address="203.0.113.7")
+    assert voter_filter.might_contain(poll.slug, "203.0.113.7")
+    before = check_count("duplicate")
+
+    # One read confirms the duplicate
+    with django_assert_num_queries(1):
+        with pytest.raises(VoteRejected) as rejected:
+            cast_vote(poll.slug, red.pk, ip_address="203.0.113.7")
+
+    assert rejected.value.reason == VoteRejected.DUPLICATE
+    assert check_count("duplicate") == before + 1
+    assert Vote.objects.filter(poll=poll).count() == 1
+
+
+def test_false_positive_still_votes(redis_client, make_poll):
+    poll = make_poll()
+    voter_filter.add(poll.slug, "203.0.113.7")
+    before = check_count("false_positive")
+
+    cast_vote(poll.slug, poll.choices.first().pk, ip_address="203.0.113.7")
+
+    assert check_count("false_positive") == before + 1
+    assert Vote.objects.filter(poll=poll).count() == 1
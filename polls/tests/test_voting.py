@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.messages import get_messages
+from django.urls import reverse
+from django.utils import timezone
+from polls.lifecycle import run_lifecycle
+
+OVERSIZED = [str(2**63), "99999999999999999999999", str(-(2**63) - 1)]
+
+
+@pytest.mark.parametrize("choice", OVERSIZED)
+def test_oversized_choice_is_not_found(client, make_poll, choice):
+    poll = make_poll()
+    response = client.post(
+        reverse("polls:poll_vote", args=[poll.slug]), {"choice": choice}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("choice", OVERSIZED)
+def test_oversized_api_choice_is_not_found(client, make_poll, choice):
+    poll = make_poll()
+    response = client.post(
+        reverse("api:poll_vote", args=[poll.slug]),
+        {"choice": int(choice)},
+        content_type="application/json",
+    )
+    assert response.status_code == 404
+
+
+def test_scheduled_close_sends_voters_to_the_results(client, make_poll):
+    poll = make_poll(end_date=timezone.now() + timedelta(hours=1))
+    run_lifecycle(now=poll.end_date)
+
+    response = client.post(
+        reverse("polls:poll_vote", args=[poll.slug]),
+        {"choice": poll.choices.first().pk},
+    )
+
+    assert response.status_code == 302
+    assert response.url == reverse("polls:poll_results", args=[poll.slug])
+    assert [str(m) for m in get_messages(response.wsgi_request)] == [
+        "This poll has ended."
+    ]
+
+
+def test_scheduled_open_is_not_open_yet(client, make_poll):
+    poll = make_poll(start_date=timezone.now() + timedelta(hours=1))
+
+    response = client.post(
+        reverse("polls:poll_vote", args=[poll.slug]),
+        {"choice": poll.choices.first().pk},
+    )
+
+    assert response.status_code == 302
+    assert response.url == reverse("polls:poll_detail", args=[poll.slug])
+    assert [str(m) for m in get_messages(response.wsgi_request)] == [
+        "This poll is not open yet."
+    ]
+    api_response = client.post(
+        reverse("api:poll_vote", args=[poll.slug]),
+        {"choice": poll.choices.first().pk},
+        content_type="application/json",
+    )
+    assert api_response.status_code == 409
+    assert api_response.data["code"] == "not_open"
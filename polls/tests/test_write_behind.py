@@ -0,0 +1,63 @@
+import pytest
+from polls import write_behind
+from polls.models import FlushedVoteEntry, Vote
+from polls.tallies import record_vote
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client(monkeypatch, settings):
+    settings.VOTE_WRITE_BEHIND = True
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(write_behind, "get_redis", lambda: client)
+    monkeypatch.setattr(write_behind, "_enqueue", None)
+    return client
+
+
+def test_voters_from_the_database_are_refused(redis_client, make_poll):
+    poll = make_poll()
+    red = poll.choices.first()
+    record_vote(poll, red, ip_address="203.0.113.7")
+
+    assert not write_behind.enqueue_vote(poll, red, ip_address="203.0.113.7")
+    assert write_behind.enqueue_vote(poll, red, ip_address="203.0.113.8")
+
+
+def test_flush_counts_only_inserted_votes(redis_client, make_poll):
+    poll = make_poll()
+    red = poll.choices.first()
+    assert write_behind.enqueue_vote(poll, red, ip_address="203.0.113.7")
+    # The voters set is lost, so the same voter gets through again
+    redis_client.delete(write_behind.voters_key(poll.pk))
+    assert write_behind.enqueue_vote(poll, red, ip_address="203.0.113.7")
+
+    assert write_behind.flush_batch() == 2
+
+    red.refresh_from_db()
+    assert red.vote_count == Vote.objects.filter(choice=red).count() == 1
+    assert write_behind.pending_counts(poll) == {red.pk: 0}
+
+
+def test_redelivered_entries_are_not_counted_twice(
+    redis_client, make_poll, monkeypatch
+):
+    poll = make_poll()
+    red = poll.choices.first()
+    write_behind.enqueue_vote(poll, red, ip_address="203.0.113.7")
+
+    # Crash after the database commit, before the entry is acknowledged
+    pipeline = redis_client.pipeline
+    monkeypatch.setattr(redis_client, "pipeline", None)
+    with pytest.raises(TypeError):
+        write_behind.flush_batch()
+    monkeypatch.setattr(redis_client, "pipeline", pipeline)
+
+    monkeypatch.setattr(write_behind, "CLAIM_IDLE_MS", 0)
+    assert write_behind.flush_batch() == 1
+
+    red.refresh_from_db()
+    assert red.vote_count == Vote.objects.filter(choice=red).count() == 1
+    assert write_behind.pending_counts(poll) == {red.pk: 0}
+    assert not FlushedVoteEntry.objects.exists()
+    assert redis_client.xlen(write_behind.STREAM_KEY) == 0
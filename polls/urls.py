@@ -1,14 +1,24 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = "polls"
 
+if settings.ASYNC_READ_VIEWS:
+    poll_list = async_views.AsyncPollListView.as_view()
+    poll_detail = async_views.AsyncPollDetailView.as_view()
+    poll_results = async_views.AsyncPollResultsView.as_view()
+else:
+    poll_list = views.PollListView.as_view()
+    poll_detail = views.PollDetailView.as_view()
+    poll_results = views.PollResultsView.as_view()
+
 urlpatterns = [
-    path("", views.PollListView.as_view(), name="poll_list"),
+    path("", poll_list, name="poll_list"),
     path("create/", views.PollCreateView.as_view(), name="poll_create"),
-    path("<slug:slug>/", views.PollDetailView.as_view(), name="poll_detail"),
+    path("<slug:slug>/", poll_detail, name="poll_detail"),
     path("<slug:slug>/edit/", views.PollUpdateView.as_view(), name="poll_edit"),
     path("<slug:slug>/delete/", views.PollDeleteView.as_view(), name="poll_delete"),
     path("<slug:slug>/vote/", views.VoteView.as_view(), name="poll_vote"),
-    path("<slug:slug>/results/", views.PollResultsView.as_view(), name="poll_results"),
+    path("<slug:slug>/results/", poll_results, name="poll_results"),
 ]
@@ -3,33 +3,64 @@ from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.db.models import Count
-from django.utils import timezone
-from .models import Poll, Choice, Vote
+from django.conf import settings
+from django.http import Http404
+from .models import Poll
 from .forms import PollForm, ChoiceFormSet
-from prometheus_client import Counter
-
-votes_cast_total = Counter("votes_cast_total", "Total number of votes cast")
-
-
-class PollListView(ListView):
+from .tallies import compute_results
+from .results_cache import get_content_version, get_results
+from .lifecycle import closed_results
+from .reach import poll_reach
+from .page_cache import AnonymousPageCacheMixin
+from .pagination import InvalidCursor, KeysetPaginator
+from .voting import VoteRejected, cast_vote
+from voting_project.instrumentation import stage
+from voting_project.replicas import ReplicaReadMixin
+
+
+class PollListView(ReplicaReadMixin, AnonymousPageCacheMixin, ListView):
     model = Poll
     template_name = "polls/poll_list.html"
     context_object_name = "polls"
     paginate_by = 10
+    page_cache_scope = "list"
+    # Annotate each poll with choice_count and vote_count for the cards
+    with_counts = True
 
     def get_queryset(self):
-        return (
-            Poll.objects.filter(is_active=True, choices__isnull=False)
-            .distinct()
-            .order_by("-created_at")
-        )
+        queryset = Poll.objects.listed()
+        if self.with_counts:
+            queryset = queryset.with_counts()
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        if settings.POLL_LIST_PAGINATION != "cursor":
+            return super().paginate_queryset(queryset, page_size)
+        # Keyset mode: no COUNT(*) and no OFFSET scan, just prev/next cursors
+        try:
+            page = KeysetPaginator(queryset, page_size).page(
+                self.request.GET.get("cursor")
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return (None, page, page.object_list, page.has_other_pages())
 
 
-class PollDetailView(DetailView):
+class PollDetailView(ReplicaReadMixin, AnonymousPageCacheMixin, DetailView):
     model = Poll
     template_name = "polls/poll_detail.html"
     context_object_name = "poll"
+    page_cache_scope = "detail"
+
+    def get_queryset(self):
+        return Poll.objects.select_related("category", "creator")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Keys the cached choices fragment; bumped when the choices change
+        context["content_version"] = get_content_version(self.object.pk)
+        context["fragment_cache_timeout"] = settings.PAGE_CACHE_TIMEOUT
+        return context
 
 
 class PollCreateView(LoginRequiredMixin, CreateView):
@@ -129,84 +160,62 @@ class PollDeleteView(LoginRequiredMixin, View):
 
 class VoteView(View):
     def post(self, request, slug):
-        poll = get_object_or_404(Poll, slug=slug)
         choice_id = request.POST.get("choice")
 
         if not choice_id:
             messages.error(request, "No choice selected.")
             return redirect("polls:poll_detail", slug=slug)
 
-        choice = get_object_or_404(Choice, id=choice_id, poll=poll)
-
-        # Check if poll is active
-        if not poll.is_active or poll.is_archived:
-            messages.error(request, "This poll is no longer active.")
-            return redirect("polls:poll_list")
-
-        # Check if poll has ended
-        if poll.end_date and poll.end_date < timezone.now():
-            messages.error(request, "This poll has ended.")
-            return redirect("polls:poll_results", slug=slug)
-
         # Handle user voting
         user = request.user if request.user.is_authenticated else None
-        ip = request.META.get("REMOTE_ADDR")
-
-        if user:
-            # Check if user already voted
-            if (
-                not poll.allow_multiple_votes
-                and Vote.objects.filter(poll=poll, user=user).exists()
-            ):
-                messages.error(request, "You have already voted in this poll.")
-                return redirect("polls:poll_results", slug=slug)
-        else:
-            # Anonymous voting check
-            if not poll.is_public:
-                messages.error(request, "Please login to vote in this private poll.")
+        try:
+            choice_text = cast_vote(
+                slug,
+                choice_id,
+                user=user,
+                ip_address=request.META.get("REMOTE_ADDR"),
+                user_agent=request.META.get("HTTP_USER_AGENT"),
+            )
+        except VoteRejected as e:
+            if e.reason == VoteRejected.NOT_FOUND:
+                raise Http404(e.message)
+            messages.error(request, e.message)
+            if e.reason == VoteRejected.NOT_OPEN:
+                return redirect("polls:poll_detail", slug=slug)
+            if e.reason == VoteRejected.INACTIVE:
+                return redirect("polls:poll_list")
+            if e.reason == VoteRejected.LOGIN_REQUIRED:
                 return redirect("users:login")
+            return redirect("polls:poll_results", slug=slug)
 
-            # Use IP to check for duplicate anonymous votes
-            if (
-                not poll.allow_multiple_votes
-                and Vote.objects.filter(
-                    poll=poll, user__isnull=True, ip_address=ip
-                ).exists()
-            ):
-                messages.error(
-                    request, "Someone from your IP has already voted anonymously."
-                )
-                return redirect("polls:poll_results", slug=slug)
-
-        Vote.objects.create(
-            poll=poll,
-            choice=choice,
-            user=user,
-            ip_address=ip,
-            user_agent=request.META.get("HTTP_USER_AGENT"),
-        )
-        votes_cast_total.inc()
-        messages.success(request, f"Vote recorded for '{choice.choice_text}'!")
-        return redirect("polls:poll_results", slug=slug)
+        with stage("vote", "redirect"):
+            messages.success(request, f"Vote recorded for '{choice_text}'!")
+            return redirect("polls:poll_results", slug=slug)
 
 
-class PollResultsView(DetailView):
+class PollResultsView(ReplicaReadMixin, AnonymousPageCacheMixin, DetailView):
     model = Poll
     template_name = "polls/poll_results.html"
     context_object_name = "poll"
+    page_cache_scope = "results"
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        poll = self.get_object()
-        choices = poll.choices.annotate(vote_count=Count("votes"))
-        total_votes = sum(c.vote_count for c in choices)
+    def get_queryset(self):
+        # Closed polls carry their final results
+        return Poll.objects.select_related("results_snapshot")
 
-        for choice in choices:
-            if total_votes > 0:
-                choice.percentage = (choice.vote_count / total_votes) * 100
-            else:
-                choice.percentage = 0
+    def get_object(self, queryset=None):
+        with stage("results", "lookup"):
+            return super().get_object(queryset)
 
-        context["choices"] = choices
-        context["total_votes"] = total_votes
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        results = closed_results(self.object)
+        if results is None:
+            with stage("results", "cache"):
+                results = get_results(self.object, compute_results)
+        context["choices"] = results["choices"]
+        context["total_votes"] = results["total_votes"]
+        if settings.REACH_ANALYTICS:
+            with stage("results", "reach"):
+                context["reach"] = poll_reach(self.object.pk)
         return context
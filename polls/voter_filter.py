@@ -0,0 +1,128 @@
+"""
+Per-poll Bloom filter of the IP addresses that have voted anonymously.
+
+``cast_vote`` consults it before inserting an anonymous vote into a poll that
+takes one vote per voter. A miss means the address has definitely not voted
+(as far as the filter knows) and the vote goes straight to the conditional
+insert, which stays authoritative. A hit means it probably has: one
+read-only query confirms the duplicate and the vote is refused without an
+``INSERT ... ON CONFLICT`` attempt and its diagnosis query. A false positive
+costs that one query, then the vote is inserted as usual.
+
+Filters are Redis strings under ``votes:bloom:<slug>``, sized for
+``VOTER_FILTER_CAPACITY`` addresses at ``VOTER_FILTER_ERROR_RATE`` and kept
+for ``VOTER_FILTER_TTL`` seconds after the last vote. When Redis is
+unreachable each process falls back to filters of its own, which only know
+the votes it saw. Either way a filter that misses an address only costs the
+usual insert, so filters may be lost, and ``manage.py rebuild_voter_filters``
+refills them from ``Vote``. Deleting a poll drops its filter, since a new poll
+may take the slug.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+
+import redis
+from django.conf import settings
+from prometheus_client import Counter
+from voting_project.utils import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Process-local filters used while Redis is down, least recently used first
+LOCAL_FILTERS_MAX = 64
+_local_filters = OrderedDict()
+_local_lock = threading.Lock()
+
+voter_filter_checks_total = Counter(
+    "voter_filter_checks_total",
+    "Anonymous voter filter lookups, by outcome",
+    ["outcome"],
+)
+
+
+def filter_key(slug):
+    return f"votes:bloom:{slug}"
+
+
+def size():
+    """(bits, hashes) for VOTER_FILTER_CAPACITY at VOTER_FILTER_ERROR_RATE."""
+    capacity = settings.VOTER_FILTER_CAPACITY
+    error_rate = settings.VOTER_FILTER_ERROR_RATE
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+def positions(ip_address):
+    """The filter bits for an address, by double hashing one digest."""
+    bits, hashes = size()
+    digest = hashlib.blake2b(ip_address.encode(), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "big")
+    step = int.from_bytes(digest[8:], "big") | 1
+    return [(first + i * step) % bits for i in range(hashes)]
+
+
+def _local_filter(slug):
+    with _local_lock:
+        bitmap = _local_filters.get(slug)
+        if bitmap is None:
+            bitmap = _local_filters[slug] = bytearray(math.ceil(size()[0] / 8))
+            if len(_local_filters) > LOCAL_FILTERS_MAX:
+                _local_filters.popitem(last=False)
+        else:
+            _local_filters.move_to_end(slug)
+        return bitmap
+
+
+def _set_bits(bitmap, offsets):
+    # Redis bit order: offset 0 is the most significant bit of the first byte
+    for offset in offsets:
+        bitmap[offset >> 3] |= 0x80 >> (offset & 7)
+
+
+def might_contain(slug, ip_address):
+    """False if the address has not voted anonymously in the poll."""
+    offsets = positions(ip_address)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for offset in offsets:
+            pipe.getbit(filter_key(slug), offset)
+        return all(pipe.execute())
+    except (redis.RedisError, OSError):
+        bitmap = _local_filter(slug)
+        return all(bitmap[offset >> 3] & (0x80 >> (offset & 7)) for offset in offsets)
+
+
+def add(slug, ip_address):
+    """Record an anonymous vote from the address. Never fails the caller."""
+    offsets = positions(ip_address)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for offset in offsets:
+            pipe.setbit(filter_key(slug), offset, 1)
+        pipe.expire(filter_key(slug), settings.VOTER_FILTER_TTL)
+        pipe.execute()
+    except (redis.RedisError, OSError):
+        _set_bits(_local_filter(slug), offsets)
+
+
+def forget(slug):
+    """Drop a deleted poll's filter. Never fails the caller."""
+    with _local_lock:
+        _local_filters.pop(slug, None)
+    try:
+        get_redis().delete(filter_key(slug))
+    except (redis.RedisError, OSError):
+        logger.warning("Could not forget the voter filter of poll %s", slug)
+
+
+def rebuild(slug, ip_addresses):
+    """Replace the poll's filter with one holding exactly these addresses."""
+    bitmap = bytearray(math.ceil(size()[0] / 8))
+    for ip_address in ip_addresses:
+        _set_bits(bitmap, positions(ip_address))
+    get_redis().set(filter_key(slug), bytes(bitmap), ex=settings.VOTER_FILTER_TTL)
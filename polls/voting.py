@@ -0,0 +1,266 @@
+"""
+Vote casting shared by the HTML and API views.
+
+The voting rules live in the database: ``cast_vote`` inserts the vote with a
+single ``INSERT ... SELECT`` whose ``WHERE`` clause holds the poll and choice
+checks, and the partial unique constraints on ``Vote`` turn a repeat voter
+into ``ON CONFLICT DO NOTHING``. On PostgreSQL the choice counter is bumped in
+the same statement, so an accepted vote costs one round trip.
+
+Only when nothing is inserted does ``cast_vote`` query again, to find out
+which rule refused the vote. Repeat anonymous voters are mostly caught
+before the insert by ``polls.voter_filter``, with one read-only query.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django_prometheus.models import model_inserts
+from prometheus_client import Counter
+from voting_project.instrumentation import stage
+from .models import Choice, Poll, Vote
+from .pagination import MAX_PK
+from .results_cache import invalidate_poll
+from .voter_filter import voter_filter_checks_total
+from . import live, reach, voter_filter, write_behind
+
+votes_cast_total = Counter("votes_cast_total", "Total number of votes cast")
+
+# Choices the vote may go to: the named poll must be open and, unless a user
+# is voting, public.
+TARGET_SQL = """
+    SELECT c.id AS choice_id, c.poll_id, c.choice_text,
+           NOT p.allow_multiple_votes AS enforce_unique
+    FROM {choice} c INNER JOIN {poll} p ON p.id = c.poll_id
+    WHERE c.id = %s AND p.slug = %s AND p.is_active AND NOT p.is_archived
+      AND (p.end_date IS NULL OR p.end_date >= %s) AND (%s OR p.is_public)
+"""
+
+INSERT_SQL = """
+    INSERT INTO {vote}
+        (poll_id, choice_id, user_id, ip_address, user_agent, voted_at,
+         enforce_unique)
+    SELECT poll_id, choice_id, %s, %s, %s, %s, enforce_unique FROM target
+    WHERE true  -- lets SQLite parse the ON CONFLICT clause
+    ON CONFLICT DO NOTHING
+"""
+
+# PostgreSQL: validate, insert and bump the counter in one statement
+POSTGRES_SQL = """
+    WITH target AS ({target}),
+    vote AS ({insert} RETURNING choice_id),
+    bump AS (
+        UPDATE {choice} SET vote_count = vote_count + 1
+        FROM vote WHERE {choice}.id = vote.choice_id
+    )
+    SELECT target.poll_id, target.choice_text, target.enforce_unique FROM target
+    INNER JOIN vote ON vote.choice_id = target.choice_id
+"""
+
+# Elsewhere (SQLite): insert and bump in one transaction
+GENERIC_SQL = """
+    WITH target AS ({target}) {insert}
+    RETURNING poll_id, choice_id, enforce_unique
+"""
+BUMP_SQL = """
+    UPDATE {choice} SET vote_count = vote_count + 1 WHERE id = %s
+    RETURNING choice_text
+"""
+
+
+class VoteRejected(Exception):
+    NOT_FOUND = "not_found"
+    NOT_OPEN = "not_open"
+    INACTIVE = "inactive"
+    ENDED = "ended"
+    LOGIN_REQUIRED = "login_required"
+    DUPLICATE = "duplicate"
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return {
+        "poll": qn(Poll._meta.db_table),
+        "choice": qn(Choice._meta.db_table),
+        "vote": qn(Vote._meta.db_table),
+    }
+
+
+def _insert_vote(slug, choice_id, user, ip_address, user_agent, now):
+    """
+    Run the conditional insert. Returns (poll_id, choice_text, enforce_unique)
+    or None.
+    """
+    tables = _tables()
+    ops = connection.ops
+    target = TARGET_SQL.format(**tables)
+    insert = INSERT_SQL.format(**tables)
+    params = [
+        choice_id,
+        slug,
+        ops.adapt_datetimefield_value(now),
+        user is not None,
+        user.pk if user else None,
+        ops.adapt_ipaddressfield_value(ip_address),
+        user_agent,
+        ops.adapt_datetimefield_value(now),
+    ]
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                POSTGRES_SQL.format(target=target, insert=insert, **tables), params
+            )
+            return cursor.fetchone()
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(GENERIC_SQL.format(target=target, insert=insert), params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        poll_id, choice_id, enforce_unique = row
+        cursor.execute(BUMP_SQL.format(**tables), [choice_id])
+        (choice_text,) = cursor.fetchone()
+    return poll_id, choice_text, bool(enforce_unique)
+
+
+def _check_rules(choice, user):
+    """Raise VoteRejected for the first voting rule the choice's poll breaks."""
+    poll = choice.poll
+
+    if poll.is_archived:
+        raise VoteRejected(VoteRejected.INACTIVE, "This poll is no longer active.")
+
+    # Saved inactive until the lifecycle task opens it at start_date
+    if poll.opened_at is None:
+        raise VoteRejected(VoteRejected.NOT_OPEN, "This poll is not open yet.")
+
+    # Checked before is_active: closing a poll at its end_date deactivates it,
+    # and its voters should still be sent to the results
+    if poll.is_closed or (poll.end_date and poll.end_date < timezone.now()):
+        raise VoteRejected(VoteRejected.ENDED, "This poll has ended.")
+
+    if not poll.is_active:
+        raise VoteRejected(VoteRejected.INACTIVE, "This poll is no longer active.")
+
+    if not user and not poll.is_public:
+        raise VoteRejected(
+            VoteRejected.LOGIN_REQUIRED, "Please login to vote in this private poll."
+        )
+
+
+def _find_choice(slug, choice_id, ip_address=None):
+    """
+    The choice with its poll. Given an ``ip_address``, ``already_voted`` is
+    also set if that address has voted anonymously in a one-vote poll.
+    """
+    choices = Choice.objects.select_related("poll")
+    if ip_address:
+        anonymous_votes = Vote.objects.filter(
+            poll=OuterRef("poll"),
+            user__isnull=True,
+            ip_address=ip_address,
+            enforce_unique=True,
+        )
+        choices = choices.annotate(already_voted=Exists(anonymous_votes))
+    choice = choices.filter(pk=choice_id, poll__slug=slug).first()
+    if choice is None:
+        raise VoteRejected(VoteRejected.NOT_FOUND, "This choice does not exist.")
+    return choice
+
+
+def _duplicate(user):
+    if user:
+        return VoteRejected(
+            VoteRejected.DUPLICATE, "You have already voted in this poll."
+        )
+    return VoteRejected(
+        VoteRejected.DUPLICATE,
+        "Someone from your IP has already voted anonymously.",
+    )
+
+
+def _refuse_known_voter(slug, choice_id, ip_address):
+    """
+    Raise VoteRejected for an anonymous voter the poll's filter recognises,
+    checked against ``Vote`` in a single read.
+    """
+    if not voter_filter.might_contain(slug, ip_address):
+        voter_filter_checks_total.labels("miss").inc()
+        return
+    choice = _find_choice(slug, choice_id, ip_address=ip_address)
+    _check_rules(choice, None)
+    if choice.already_voted:
+        voter_filter_checks_total.labels("duplicate").inc()
+        raise _duplicate(None)
+    voter_filter_checks_total.labels("false_positive").inc()
+
+
+def cast_vote(slug, choice_id, user=None, ip_address=None, user_agent=None):
+    """
+    Record a vote for choice ``choice_id`` of poll ``slug`` and return the
+    choice's text. Raises VoteRejected with a user-facing message if the vote
+    is refused.
+    """
+    try:
+        choice_id = int(choice_id)
+    except (TypeError, ValueError):
+        raise VoteRejected(VoteRejected.NOT_FOUND, "This choice does not exist.")
+    if not -MAX_PK - 1 <= choice_id <= MAX_PK:
+        # The database driver would overflow binding it
+        raise VoteRejected(VoteRejected.NOT_FOUND, "This choice does not exist.")
+
+    if settings.VOTE_WRITE_BEHIND:
+        # Redis de-duplicates voters; the vote reaches the database on flush
+        with stage("vote", "lookup"):
+            choice = _find_choice(slug, choice_id)
+            _check_rules(choice, user)
+        with stage("vote", "enqueue"):
+            accepted = write_behind.enqueue_vote(
+                choice.poll,
+                choice,
+                user=user,
+                ip_address=ip_address,
+                user_agent=user_agent,
+            )
+        if not accepted:
+            raise _duplicate(user)
+        poll_id, choice_text = choice.poll_id, choice.choice_text
+    else:
+        anonymous = user is None and ip_address and settings.VOTER_FILTER
+        if anonymous:
+            with stage("vote", "filter"):
+                _refuse_known_voter(slug, choice_id, ip_address)
+        with stage("vote", "insert"):
+            inserted = _insert_vote(
+                slug, choice_id, user, ip_address, user_agent, timezone.now()
+            )
+        if inserted is None:
+            # Nothing was written: work out which rule refused the vote. If
+            # the poll is open, the insert hit a duplicate-vote constraint.
+            with stage("vote", "diagnose"):
+                _check_rules(_find_choice(slug, choice_id), user)
+            if anonymous:
+                # A vote from before the filter knew this address
+                voter_filter.add(slug, ip_address)
+            raise _duplicate(user)
+        poll_id, choice_text, enforce_unique = inserted
+        if anonymous and enforce_unique:
+            voter_filter.add(slug, ip_address)
+        # The raw insert bypasses the ORM, so do what its hooks would have
+        model_inserts.labels("vote").inc()
+        invalidate_poll(poll_id)
+
+    votes_cast_total.inc()
+    with stage("vote", "publish"):
+        live.publish_vote(poll_id, choice_id)
+    if settings.REACH_ANALYTICS:
+        with stage("vote", "reach"):
+            reach.record_vote(poll_id, user=user, ip_address=ip_address)
+    return choice_text
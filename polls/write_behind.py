@@ -0,0 +1,290 @@
+"""
+Write-behind vote acceptance backed by Redis.
+
+When ``VOTE_WRITE_BEHIND`` is on, ``VoteView`` hands accepted votes to
+``enqueue_vote`` instead of inserting them. A single Lua call de-duplicates
+the voter, bumps a sharded per-poll hash counter and appends the vote to a
+stream. ``polls.tasks.flush_vote_stream`` later drains the stream into
+``Vote`` with ``bulk_create`` and folds the counters into ``Choice.vote_count``.
+Cached results are invalidated on flush, so they trail by one flush interval.
+
+The sharded counters only hold votes that have not been flushed yet, so the
+live tally of a choice is ``Choice.vote_count + pending_counts(poll)[choice]``.
+
+Duplicate voters are rejected by a per-poll Redis set rather than ``exists()``
+queries. The set is seeded from the poll's ``Vote`` rows the first time it is
+needed, and the partial unique constraints on ``Vote`` still drop any
+duplicate that gets past it at flush.
+
+Flushing is idempotent. A flush counts only the votes its insert returned,
+and records each stream entry in ``FlushedVoteEntry`` in the same
+transaction, so an entry redelivered after a crash between the commit and
+``XACK`` is skipped rather than inserted and counted again.
+"""
+
+import random
+import socket
+from collections import Counter
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from voting_project.utils import get_redis
+from .models import Choice, FlushedVoteEntry, Vote
+from .results_cache import invalidate_poll
+
+STREAM_KEY = "votes:stream"
+GROUP_NAME = "vote-flushers"
+# Entries held by a dead consumer for this long are reclaimed by another one.
+CLAIM_IDLE_MS = 60_000
+# Ledger rows left behind by a crash after XACK are deleted after this long
+LEDGER_RETENTION = timedelta(days=1)
+SEED_BATCH_SIZE = 1000
+
+# KEYS: voters set, its seeded marker, pending counter shard, stream
+# ARGV: dedupe flag, voter id, choice id, then stream field/value pairs
+# Returns 1 if accepted, 0 for a duplicate, -1 if the voters set needs seeding
+ENQUEUE_SCRIPT = """
+if ARGV[1] == '1' then
+    if redis.call('EXISTS', KEYS[2]) == 0 then
+        return -1
+    end
+    if redis.call('SADD', KEYS[1], ARGV[2]) == 0 then
+        return 0
+    end
+end
+redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+redis.call('XADD', KEYS[4], '*', unpack(ARGV, 4))
+return 1
+"""
+
+LEDGER_SQL = """
+    INSERT INTO {ledger} (entry_id, flushed_at) VALUES {rows}
+    ON CONFLICT DO NOTHING RETURNING entry_id
+"""
+VOTES_SQL = """
+    INSERT INTO {vote}
+        (poll_id, choice_id, user_id, ip_address, user_agent, voted_at,
+         enforce_unique)
+    VALUES {rows}
+    ON CONFLICT DO NOTHING RETURNING choice_id
+"""
+
+_enqueue = None
+
+
+def _enqueue_script():
+    global _enqueue
+    if _enqueue is None:
+        _enqueue = get_redis().register_script(ENQUEUE_SCRIPT)
+    return _enqueue
+
+
+def voters_key(poll_id):
+    return f"votes:voters:{poll_id}"
+
+
+def seeded_key(poll_id):
+    return f"votes:voters:{poll_id}:seeded"
+
+
+def voter_id(user_id, ip_address):
+    return f"u:{user_id}" if user_id else f"ip:{ip_address}"
+
+
+def pending_key(poll_id, shard):
+    return f"votes:pending:{poll_id}:{shard}"
+
+
+def enqueue_vote(poll, choice, user=None, ip_address=None, user_agent=None):
+    """
+    Accept a vote into Redis. Returns False if this voter has already voted
+    in the poll (only checked when the poll disallows multiple votes).
+    """
+    shard = random.randrange(settings.VOTE_COUNTER_SHARDS)
+    voter = voter_id(user.pk if user else None, ip_address)
+    fields = {
+        "poll": poll.pk,
+        "choice": choice.pk,
+        "user": user.pk if user else "",
+        "ip": ip_address or "",
+        "ua": user_agent or "",
+        "shard": shard,
+        "unique": "0" if poll.allow_multiple_votes else "1",
+    }
+    args = ["0" if poll.allow_multiple_votes else "1", voter, choice.pk]
+    for name, value in fields.items():
+        args.extend([name, value])
+    keys = [
+        voters_key(poll.pk),
+        seeded_key(poll.pk),
+        pending_key(poll.pk, shard),
+        STREAM_KEY,
+    ]
+    accepted = _enqueue_script()(keys=keys, args=args)
+    if accepted == -1:
+        seed_voters(poll.pk)
+        accepted = _enqueue_script()(keys=keys, args=args)
+    return accepted == 1
+
+
+def seed_voters(poll_id):
+    """
+    Add the voters the database already holds for a poll to its voters set,
+    so people who voted before write-behind mode are refused too.
+    """
+    client = get_redis()
+    voters = (
+        Vote.objects.filter(poll_id=poll_id, enforce_unique=True)
+        .order_by()
+        .values_list("user_id", "ip_address")
+    )
+    batch = []
+    for user_id, ip_address in voters.iterator(chunk_size=SEED_BATCH_SIZE):
+        batch.append(voter_id(user_id, ip_address))
+        if len(batch) == SEED_BATCH_SIZE:
+            client.sadd(voters_key(poll_id), *batch)
+            batch = []
+    if batch:
+        client.sadd(voters_key(poll_id), *batch)
+    client.set(seeded_key(poll_id), 1)
+
+
+def pending_counts(poll):
+    """Sum the unflushed per-choice deltas across every shard of a poll."""
+    client = get_redis()
+    pipe = client.pipeline(transaction=False)
+    for shard in range(settings.VOTE_COUNTER_SHARDS):
+        pipe.hgetall(pending_key(poll.pk, shard))
+    totals = Counter()
+    for shard_counts in pipe.execute():
+        for choice_id, count in shard_counts.items():
+            totals[int(choice_id)] += int(count)
+    return totals
+
+
+def _ensure_group(client):
+    try:
+        client.xgroup_create(STREAM_KEY, GROUP_NAME, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _read_batch(client, consumer, count):
+    # Pick up work abandoned by crashed consumers before taking new entries.
+    # Redis 7 appends a list of deleted ids to the reply, 6.2 does not.
+    entries = client.xautoclaim(
+        STREAM_KEY, GROUP_NAME, consumer, CLAIM_IDLE_MS, start_id="0-0", count=count
+    )[1]
+    if not entries:
+        response = client.xreadgroup(
+            GROUP_NAME, consumer, {STREAM_KEY: ">"}, count=count
+        )
+        entries = response[0][1] if response else []
+    return entries
+
+
+def _values(rows):
+    """A VALUES list and its parameters for rows of equal length."""
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(rows[0])) + ")"] * len(rows))
+    return placeholders, [value for row in rows for value in row]
+
+
+def _record_entries(entry_ids, now):
+    """Record entries as flushed. Returns the ids no earlier flush recorded."""
+    placeholders, params = _values(
+        [
+            (entry_id, connection.ops.adapt_datetimefield_value(now))
+            for entry_id in entry_ids
+        ]
+    )
+    ledger = connection.ops.quote_name(FlushedVoteEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(LEDGER_SQL.format(ledger=ledger, rows=placeholders), params)
+        return {entry_id for (entry_id,) in cursor.fetchall()}
+
+
+def _insert_votes(entries, now):
+    """Insert the entries' votes. Returns the choice ids of the rows inserted."""
+    ops = connection.ops
+    rows = [
+        (
+            int(fields["poll"]),
+            int(fields["choice"]),
+            int(fields["user"]) if fields["user"] else None,
+            ops.adapt_ipaddressfield_value(fields["ip"] or None),
+            fields["ua"] or None,
+            # Stamped at flush time, which trails acceptance by at most one
+            # flush interval
+            ops.adapt_datetimefield_value(now),
+            fields.get("unique") == "1",
+        )
+        for fields in entries
+    ]
+    placeholders, params = _values(rows)
+    vote = ops.quote_name(Vote._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(VOTES_SQL.format(vote=vote, rows=placeholders), params)
+        return [choice_id for (choice_id,) in cursor.fetchall()]
+
+
+def flush_batch(batch_size=None, consumer=None):
+    """Move one batch from the stream into Postgres. Returns entries flushed."""
+    client = get_redis()
+    _ensure_group(client)
+    batch_size = batch_size or settings.VOTE_FLUSH_BATCH_SIZE
+    consumer = consumer or socket.gethostname()
+
+    entries = _read_batch(client, consumer, batch_size)
+    if not entries:
+        return 0
+
+    deltas = Counter()
+    for _, fields in entries:
+        key = (int(fields["poll"]), int(fields["shard"]), int(fields["choice"]))
+        deltas[key] += 1
+    ids = [entry_id for entry_id, _ in entries]
+
+    now = timezone.now()
+    with transaction.atomic():
+        fresh = _record_entries(ids, now)
+        votes = [fields for entry_id, fields in entries if entry_id in fresh]
+        # Only rows actually inserted count: duplicates the voters set missed
+        # hit the unique constraints and are left out
+        inserted = Counter(_insert_votes(votes, now) if votes else [])
+        for choice_id, count in inserted.items():
+            Choice.objects.filter(pk=choice_id).update(
+                vote_count=F("vote_count") + count
+            )
+        # The raw insert sends no signals, so invalidate cached results here
+        for poll_id in {poll_id for poll_id, _, _ in deltas}:
+            invalidate_poll(poll_id)
+
+    # Every entry leaves the pending counters, whether its vote was inserted
+    # now, by an earlier flush, or refused as a duplicate
+    pipe = client.pipeline()
+    for (poll_id, shard, choice_id), count in deltas.items():
+        pipe.hincrby(pending_key(poll_id, shard), choice_id, -count)
+    pipe.xack(STREAM_KEY, GROUP_NAME, *ids)
+    pipe.xdel(STREAM_KEY, *ids)
+    pipe.execute()
+    # Acknowledged entries are never redelivered
+    FlushedVoteEntry.objects.filter(
+        Q(entry_id__in=ids) | Q(flushed_at__lt=now - LEDGER_RETENTION)
+    ).delete()
+    return len(entries)
+
+
+def flush_stream(batch_size=None, max_batches=100):
+    """Drain the stream in batches. Returns the total number of votes flushed."""
+    flushed = 0
+    for _ in range(max_batches):
+        count = flush_batch(batch_size)
+        flushed += count
+        if not count:
+            break
+    return flushed
@@ -0,0 +1,545 @@
+"""
+Asynchronous load generator for the voting app.
+
+Drives a running server (runserver, gunicorn, or the cluster through
+port_forward.ps1) with a weighted mix of poll list, detail, results and vote
+requests from many concurrent workers. It then writes latency percentiles and
+throughput to a JSON report that later runs can be compared against.
+
+    pip install httpx
+    python scripts/load_test.py --profile steady --concurrency 50 --duration 60
+    python scripts/load_test.py --compare baseline.json --output candidate.json
+    python scripts/load_test.py --compare baseline.json candidate.json
+
+Profiles set how many workers are active over the run:
+
+    steady  ramp up over the first 10% of the run, then hold
+    spike   hold 20% of the workers, then all of them for the middle fifth
+    soak    like steady, but defaults to a 30 minute run
+    ramp    add workers steadily over the whole run, to find where it breaks
+
+Each report records its capacity: the most workers the server kept up with
+before the first second whose p99 exceeded --slo-ms or that saw errors. To
+compare the sync (gunicorn) and async (uvicorn) deployments, run the same
+ramp against each, with a few --slow-clients holding connections open the
+way clients on bad networks do:
+
+    GUNICORN_WORKERS=2 gunicorn
+    python scripts/load_test.py --profile ramp --surface html --concurrency 300 \\
+        --slow-clients 8 --label sync --output sync.json
+
+    GUNICORN_WORKER_CLASS=uvicorn GUNICORN_WORKERS=2 ASYNC_READ_VIEWS=true gunicorn
+    python scripts/load_test.py --profile ramp --surface html --concurrency 300 \\
+        --slow-clients 8 --label async --output async.json --compare sync.json
+
+Votes are anonymous, so every worker shares the server's per-IP duplicate
+check and the "votes" throttle scope. To measure inserts rather than 409/429
+responses, raise API_THROTTLE_VOTES on the server and vote on polls that
+allow multiple votes.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+DEFAULT_MIX = "list=30,detail=30,results=25,vote=15"
+PERCENTILES = (50, 75, 90, 95, 99, 99.9)
+PROFILE_DURATIONS = {"steady": 60, "spike": 60, "soak": 1800, "ramp": 120}
+
+
+def steady(progress):
+    return min(1.0, progress / 0.1)
+
+
+def spike(progress):
+    return 1.0 if 0.4 <= progress < 0.6 else 0.2
+
+
+def ramp(progress):
+    return progress
+
+
+PROFILES = {"steady": steady, "spike": spike, "soak": steady, "ramp": ramp}
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram in the manner of HdrHistogram. Values (microseconds)
+    below 1024 are kept exactly; larger ones fall into one of 512 linear
+    buckets per power of two. That bounds the error to 0.2% in constant
+    memory, and histograms can be merged across endpoints.
+    """
+
+    SUB_BUCKET_BITS = 10
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, micros):
+        micros = max(int(micros), 0)
+        shift = max(micros.bit_length() - self.SUB_BUCKET_BITS, 0)
+        self.counts[(shift, micros >> shift)] += 1
+        self.total += 1
+        self.sum += micros
+        self.max = max(self.max, micros)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        if not self.total:
+            return 0
+        rank = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for shift, bucket in sorted(self.counts, key=lambda k: k[1] << k[0]):
+            seen += self.counts[(shift, bucket)]
+            if seen >= rank:
+                # Report the top of the bucket, as HdrHistogram does
+                return min(((bucket + 1) << shift) - 1, self.max)
+        return self.max
+
+    def summary(self):
+        """Latency summary in milliseconds."""
+        summary = {f"p{pct:g}": self.percentile(pct) / 1000 for pct in PERCENTILES}
+        summary["max"] = self.max / 1000
+        summary["mean"] = self.sum / self.total / 1000 if self.total else 0
+        return summary
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = Counter()
+        self.errors = 0
+
+    def as_dict(self, elapsed):
+        return {
+            "requests": self.latency.total,
+            "errors": self.errors,
+            "throughput_rps": self.latency.total / elapsed if elapsed else 0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency_ms": self.latency.summary(),
+        }
+
+
+class LoadTest:
+    def __init__(self, client, targets, options):
+        self.client = client
+        self.targets = targets
+        self.options = options
+        self.surface = options.surface
+        self.duration = options.duration
+        self.profile = PROFILES[options.profile]
+        endpoints, weights = zip(*parse_mix(options.mix).items())
+        self.endpoints = endpoints
+        self.weights = weights
+        self.stats = {name: EndpointStats() for name in endpoints}
+        self.timeline = []
+        self.slow_requests = 0
+        self.slow_errors = 0
+        self.active = 0
+        self.finished = False
+        self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def url(self, endpoint, slug):
+        if self.surface == "api":
+            paths = {
+                "list": "/api/v1/polls/",
+                "detail": f"/api/v1/polls/{slug}/",
+                "results": f"/api/v1/polls/{slug}/results/",
+                "vote": f"/api/v1/polls/{slug}/vote/",
+            }
+        else:
+            paths = {
+                "list": "/",
+                "detail": f"/{slug}/",
+                "results": f"/{slug}/results/",
+                "vote": f"/{slug}/vote/",
+            }
+        return paths[endpoint]
+
+    async def request(self, endpoint):
+        slug, choices = random.choice(self.targets)
+        url = self.url(endpoint, slug)
+        if endpoint != "vote":
+            return await self.client.get(url)
+        choice = random.choice(choices)
+        if self.surface == "api":
+            return await self.client.post(url, json={"choice": choice})
+        csrf = self.client.cookies.get("csrftoken", "")
+        return await self.client.post(
+            url, data={"choice": choice}, headers={"X-CSRFToken": csrf}
+        )
+
+    async def call(self, endpoint, second):
+        stats = self.stats[endpoint]
+        start = time.perf_counter()
+        try:
+            response = await self.request(endpoint)
+        except httpx.HTTPError as e:
+            stats.errors += 1
+            stats.statuses[type(e).__name__] += 1
+            failed = True
+        else:
+            stats.statuses[str(response.status_code)] += 1
+            failed = response.status_code >= 500
+            if failed:
+                stats.errors += 1
+        micros = (time.perf_counter() - start) * 1_000_000
+        stats.latency.record(micros)
+        second["latency"].record(micros)
+        second["requests"] += 1
+        second["errors"] += failed
+
+    async def worker(self, index):
+        while not self.finished:
+            if index >= self.active:
+                await asyncio.sleep(0.05)
+                continue
+            endpoint = random.choices(self.endpoints, self.weights)[0]
+            await self.call(endpoint, self.timeline[-1])
+            if self.options.think_time:
+                await asyncio.sleep(random.expovariate(1 / self.options.think_time))
+
+    async def slow_client(self):
+        """
+        Hold a connection open by trickling one header line per second for
+        --slow-hold seconds before finishing the request, over and over. A
+        sync worker is tied up reading each such request.
+        """
+        url = httpx.URL(self.options.base_url)
+        port = url.port or (443 if url.scheme == "https" else 80)
+        while not self.finished:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(
+                    url.host, port, ssl=url.scheme == "https"
+                )
+                writer.write(f"GET / HTTP/1.1\r\nHost: {url.host}\r\n".encode())
+                deadline = time.perf_counter() + self.options.slow_hold
+                while time.perf_counter() < deadline and not self.finished:
+                    await writer.drain()
+                    await asyncio.sleep(1)
+                    writer.write(b"X-Slow-Client: 1\r\n")
+                writer.write(b"Connection: close\r\n\r\n")
+                await writer.drain()
+                await asyncio.wait_for(reader.read(), self.options.timeout)
+                self.slow_requests += 1
+            except (OSError, asyncio.TimeoutError):
+                self.slow_errors += 1
+                await asyncio.sleep(1)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    def new_second(self, second):
+        self.timeline.append(
+            {
+                "second": second,
+                "workers": 0,
+                "requests": 0,
+                "errors": 0,
+                "latency": LatencyHistogram(),
+            }
+        )
+
+    def close_second(self):
+        last = self.timeline[-1]
+        last["p99_ms"] = last.pop("latency").percentile(99) / 1000
+
+    async def run(self):
+        concurrency = self.options.concurrency
+        started = time.perf_counter()
+        self.new_second(0)
+        workers = [asyncio.create_task(self.worker(i)) for i in range(concurrency)]
+        workers += [
+            asyncio.create_task(self.slow_client())
+            for _ in range(self.options.slow_clients)
+        ]
+        try:
+            while (elapsed := time.perf_counter() - started) < self.duration:
+                second = int(elapsed)
+                if second >= len(self.timeline):
+                    self.close_second()
+                    self.report_progress()
+                    self.new_second(second)
+                fraction = self.profile(elapsed / self.duration)
+                self.active = max(1, round(concurrency * fraction))
+                self.timeline[-1]["workers"] = max(
+                    self.timeline[-1]["workers"], self.active
+                )
+                await asyncio.sleep(0.1)
+        finally:
+            self.finished = True
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.close_second()
+        return time.perf_counter() - started
+
+    def report_progress(self):
+        last = self.timeline[-1]
+        print(
+            f"[{last['second']:>5}s] workers={last['workers']:<4} "
+            f"rps={last['requests']:<6} p99={last['p99_ms']:<8.1f} "
+            f"errors={last['errors']}"
+        )
+
+    def capacity(self):
+        """Most workers served before the first second over the SLO."""
+        workers = 0
+        for second in self.timeline:
+            if not second["requests"]:
+                continue
+            if second["errors"] or second["p99_ms"] > self.options.slo_ms:
+                break
+            workers = max(workers, second["workers"])
+        return workers
+
+    def report(self, elapsed):
+        overall = EndpointStats()
+        for stats in self.stats.values():
+            overall.latency.merge(stats.latency)
+            overall.statuses.update(stats.statuses)
+            overall.errors += stats.errors
+        options = self.options
+        return {
+            "meta": {
+                "label": options.label,
+                "started_at": self.started_at,
+                "base_url": options.base_url,
+                "surface": self.surface,
+                "profile": options.profile,
+                "concurrency": options.concurrency,
+                "duration_s": elapsed,
+                "think_time_s": options.think_time,
+                "slow_clients": options.slow_clients,
+                "slo_ms": options.slo_ms,
+                "mix": parse_mix(options.mix),
+                "polls": len(self.targets),
+                "python": platform.python_version(),
+            },
+            "overall": overall.as_dict(elapsed),
+            "capacity_workers": self.capacity(),
+            "slow_clients": {
+                "completed": self.slow_requests,
+                "errors": self.slow_errors,
+            },
+            "endpoints": {
+                name: stats.as_dict(elapsed) for name, stats in self.stats.items()
+            },
+            "timeline": self.timeline,
+        }
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("list", "detail", "results", "vote"):
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def discover(client, max_polls):
+    """Collect (slug, [choice ids]) for up to max_polls open polls via the API."""
+    slugs = []
+    url = "/api/v1/polls/"
+    while url and len(slugs) < max_polls:
+        response = await client.get(url)
+        response.raise_for_status()
+        page = response.json()
+        slugs.extend(poll["slug"] for poll in page["results"])
+        url = page.get("next")
+    targets = []
+    for slug in slugs[:max_polls]:
+        response = await client.get(f"/api/v1/polls/{slug}/")
+        response.raise_for_status()
+        choices = [choice["id"] for choice in response.json()["choices"]]
+        if choices:
+            targets.append((slug, choices))
+    return targets
+
+
+async def run_load_test(options):
+    limits = httpx.Limits(
+        max_connections=options.concurrency,
+        max_keepalive_connections=options.concurrency,
+    )
+    async with httpx.AsyncClient(
+        base_url=options.base_url, limits=limits, timeout=options.timeout
+    ) as client:
+        targets = await discover(client, options.max_polls)
+        if not targets:
+            sys.exit("No polls with choices found; seed some data first.")
+        if options.surface == "html":
+            # The vote form sets the CSRF cookie sent back with HTML votes
+            await client.get(f"/{targets[0][0]}/")
+
+        test = LoadTest(client, targets, options)
+        print(
+            f"Running {options.profile} profile against {options.base_url} for "
+            f"{options.duration}s with up to {options.concurrency} workers "
+            f"over {len(targets)} polls..."
+        )
+        elapsed = await test.run()
+        return test.report(elapsed)
+
+
+def print_report(report):
+    overall = report["overall"]
+    print(
+        f"\n{overall['requests']} requests in {report['meta']['duration_s']:.1f}s "
+        f"({overall['throughput_rps']:.1f} req/s), {overall['errors']} errors"
+    )
+    print(
+        f"{'endpoint':<10}{'req/s':>10}{'p50':>10}{'p90':>10}{'p99':>10}"
+        f"{'p99.9':>10}{'max':>10}  statuses"
+    )
+    for name, stats in sections(report).items():
+        latency = stats["latency_ms"]
+        print(
+            f"{name:<10}{stats['throughput_rps']:>10.1f}"
+            + "".join(
+                f"{latency[key]:>10.1f}" for key in ("p50", "p90", "p99", "p99.9")
+            )
+            + f"{latency['max']:>10.1f}  {stats['statuses']}"
+        )
+    print(
+        f"Capacity: {report['capacity_workers']} workers within a "
+        f"{report['meta']['slo_ms']:g}ms p99"
+    )
+
+
+def sections(report):
+    return {**report["endpoints"], "overall": report["overall"]}
+
+
+def print_comparison(baseline, candidate):
+    print(
+        f"\nComparing {baseline['meta'].get('label') or 'baseline'} -> "
+        f"{candidate['meta'].get('label') or 'candidate'} (latency in ms)"
+    )
+    print(f"{'endpoint':<10}{'metric':<8}{'before':>10}{'after':>10}{'change':>10}")
+    before_sections = sections(baseline)
+    for name, after in sections(candidate).items():
+        before = before_sections.get(name)
+        if before is None:
+            continue
+        rows = [("req/s", before["throughput_rps"], after["throughput_rps"])]
+        for key in ("p50", "p99", "p99.9"):
+            rows.append((key, before["latency_ms"][key], after["latency_ms"][key]))
+        for metric, old, new in rows:
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{name:<10}{metric:<8}{old:>10.1f}{new:>10.1f}{change:>10}")
+    if "capacity_workers" in baseline and "capacity_workers" in candidate:
+        old, new = baseline["capacity_workers"], candidate["capacity_workers"]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{'capacity':<10}{'workers':<8}{old:>10}{new:>10}{change:>10}")
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="steady")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--duration", type=float, help="Seconds to run (default depends on profile)"
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"Weighted endpoint mix (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument(
+        "--surface",
+        choices=("api", "html"),
+        default="api",
+        help="Hit the JSON API or the server-rendered pages",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="Mean pause in seconds between a worker's requests",
+    )
+    parser.add_argument(
+        "--slow-clients",
+        type=int,
+        default=0,
+        help="Extra connections that send their requests slowly",
+    )
+    parser.add_argument(
+        "--slow-hold",
+        type=float,
+        default=10.0,
+        help="Seconds each slow client takes to send a request",
+    )
+    parser.add_argument(
+        "--slo-ms",
+        type=float,
+        default=500.0,
+        help="p99 latency a second must stay under to count toward capacity",
+    )
+    parser.add_argument("--max-polls", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--label", help="Name for this run in reports")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="REPORT",
+        help="Compare against a baseline report; with two reports, only compare",
+    )
+    options = parser.parse_args()
+
+    if options.compare and len(options.compare) > 2:
+        parser.error("--compare takes a baseline and an optional candidate report")
+    if options.compare and len(options.compare) == 2:
+        baseline, candidate = map(load_report, options.compare)
+        print_comparison(baseline, candidate)
+        return
+
+    if options.duration is None:
+        options.duration = PROFILE_DURATIONS[options.profile]
+    try:
+        parse_mix(options.mix)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(run_load_test(options))
+    print_report(report)
+
+    output = options.output or (
+        f"load-{options.profile}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+    if options.compare:
+        print_comparison(load_report(options.compare[0]), report)
+
+
+if __name__ == "__main__":
+    main()
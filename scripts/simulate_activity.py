@@ -96,23 +96,23 @@ class MockUser:
         return None
 
     def vote(self, poll_url):
+        # Use the JSON API rather than scraping the poll page for choice ids
+        slug = poll_url.rstrip("/").rsplit("/", 1)[-1]
+        api_url = f"{BASE_URL}/api/v1/polls/{slug}/"
         try:
-            response = self.session.get(poll_url, timeout=10)
-            soup = BeautifulSoup(response.text, "html.parser")
-            csrf_input = soup.find("input", {"name": "csrfmiddlewaretoken"})
-            if not csrf_input:
-                return False
-            self.csrf_token = csrf_input["value"]
-
-            choices = soup.find_all("input", {"name": "choice"})
+            response = self.session.get(api_url, timeout=10)
+            choices = response.json().get("choices") if response.ok else None
             if not choices:
                 return False
 
-            selected_choice = random.choice(choices)["value"]
-            vote_url = poll_url.rstrip("/") + "/vote/"
-            data = {"csrfmiddlewaretoken": self.csrf_token, "choice": selected_choice}
-            response = self.session.post(vote_url, data=data, timeout=10)
-            if response.status_code == 200:
+            selected_choice = random.choice(choices)["id"]
+            response = self.session.post(
+                f"{api_url}vote/",
+                json={"choice": selected_choice},
+                headers={"X-CSRFToken": self.session.cookies.get("csrftoken", "")},
+                timeout=10,
+            )
+            if response.status_code == 201:
                 return True
         except Exception:
             # print(f"Voting error on {poll_url}: {e}")
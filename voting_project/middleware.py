@@ -0,0 +1,200 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from prometheus_client import Counter
+from whitenoise import middleware as whitenoise
+from . import instrumentation, replicas
+
+logger = logging.getLogger("voting_project.queries")
+
+query_budget_exceeded_total = Counter(
+    "query_budget_exceeded_total",
+    "Requests that ran more SQL queries than their view's budget",
+    ["view"],
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def add_execute_wrapper(wrapper):
+    for alias in settings.DATABASES:
+        connections[alias].execute_wrappers.append(wrapper)
+
+
+def remove_execute_wrapper(wrapper):
+    for alias in settings.DATABASES:
+        connections[alias].execute_wrappers.remove(wrapper)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the SQL queries each request runs and the time they take, and hold
+    views to the budgets in ``QUERY_BUDGETS`` (keyed by URL name).
+
+    Every request is observed in the ``http_request_db_*`` histograms and
+    logged as a JSON line on the ``voting_project.queries`` logger. Requests
+    over budget are logged as warnings; with ``QUERY_BUDGET_MODE = "raise"``
+    (set it in tests) they raise ``QueryBudgetExceeded`` instead.
+    ``manage.py query_report`` aggregates the log lines.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not instrumentation.enabled():
+            return self.get_response(request)
+
+        # One counter on every alias, so reads routed to a replica count too
+        counter = instrumentation.QueryCounter()
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        return self.check_budget(request, response, counter)
+
+    async def __acall__(self, request):
+        if not instrumentation.enabled():
+            return await self.get_response(request)
+
+        # The async ORM runs a request's queries in one sync thread, so the
+        # wrapper goes on that thread's connections
+        counter = instrumentation.QueryCounter()
+        await sync_to_async(add_execute_wrapper)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_execute_wrapper)(counter)
+        return self.check_budget(request, response, counter)
+
+    def check_budget(self, request, response, counter):
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        instrumentation.db_queries_per_request.labels(view).observe(counter.count)
+        instrumentation.db_seconds_per_request.labels(view).observe(counter.duration)
+        if settings.QUERY_STATS_HEADERS:
+            response["X-DB-Queries"] = counter.count
+            response["X-DB-Time-Ms"] = f"{counter.duration * 1000:.2f}"
+
+        budget = settings.QUERY_BUDGETS.get(view)
+        over_budget = budget is not None and counter.count > budget
+        record = {
+            "event": "db_queries",
+            "view": view,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": counter.count,
+            "db_ms": round(counter.duration * 1000, 2),
+            "budget": budget,
+        }
+        if not over_budget:
+            logger.info(json.dumps(record))
+            return response
+
+        query_budget_exceeded_total.labels(view).inc()
+        if settings.QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(
+                f"{view} ran {counter.count} queries, over its budget of {budget}."
+            )
+        logger.warning(json.dumps(record))
+        return response
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise that stays async under ASGI. The stock middleware is sync only,
+    which would push every request through a worker thread; here only static
+    file responses are built in one.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Track which database each request may read from for
+    ``voting_project.replicas.ReplicaRouter``, and pin visitors who write to
+    the primary for ``REPLICA_STICKY_SECONDS`` with a cookie. Unused when no
+    read replicas are configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.READ_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = self.start(request)
+        token = replicas.current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.current.reset(token)
+        return self.stick(request, response, routing)
+
+    async def __acall__(self, request):
+        routing = self.start(request)
+        token = replicas.current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replicas.current.reset(token)
+        return self.stick(request, response, routing)
+
+    def start(self, request):
+        return replicas.Routing(
+            pinned=settings.REPLICA_STICKY_COOKIE in request.COOKIES
+        )
+
+    def stick(self, request, response, routing):
+        if routing.wrote or request.method not in ("GET", "HEAD", "OPTIONS"):
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
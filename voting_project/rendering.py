@@ -0,0 +1,53 @@
+"""
+Template engine setup shared by the Django and Jinja2 backends.
+
+``environment()`` builds the Jinja2 environment used when
+``TEMPLATE_ENGINE = "jinja2"``: it exposes ``url()`` and ``static()`` plus the
+handful of Django filters the poll templates use.
+
+``warm_templates()`` compiles every project template into its engine's cache.
+The WSGI and ASGI entry points call it at import time when ``TEMPLATE_WARMUP``
+is on, so the first requests a fresh worker serves skip parsing.
+"""
+
+from pathlib import Path
+
+from django.template import engines
+from django.template.defaultfilters import (
+    date,
+    floatformat,
+    pluralize,
+    timesince_filter,
+    truncatewords,
+)
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update(url=url, static=static)
+    env.filters.update(
+        date=date,
+        floatformat=floatformat,
+        pluralize=pluralize,
+        timesince=timesince_filter,
+        truncatewords=truncatewords,
+    )
+    return env
+
+
+def warm_templates():
+    """Load each ``.html`` file under the engines' template dirs; return the count."""
+    warmed = 0
+    for engine in engines.all():
+        for directory in map(Path, engine.template_dirs):
+            for path in sorted(directory.rglob("*.html")):
+                engine.get_template(path.relative_to(directory).as_posix())
+                warmed += 1
+    return warmed
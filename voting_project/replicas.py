@@ -0,0 +1,93 @@
+"""
+Read-replica routing.
+
+Views that only read mix in ``ReplicaReadMixin``: their GET and HEAD
+requests read from one of ``READ_REPLICAS``, picked once per request.
+Everything else reads from the primary, and every write goes to it.
+``voting_project.middleware.ReplicaRoutingMiddleware`` tracks each request's
+routing in a context variable, which ``ReplicaRouter`` consults and which
+the async ORM carries into its worker threads.
+
+Replicas lag. A visitor who just wrote (any POST, PUT, PATCH or DELETE, or a
+request that wrote to the database) is given the ``REPLICA_STICKY_COOKIE``
+and reads from the primary for ``REPLICA_STICKY_SECONDS``, so they see their
+own vote. Others may see pages up to the replica's lag behind, and a page or
+result cached from a replica keeps that lag until it expires or the next
+change bumps its version.
+
+Every decision is counted in ``db_routing_decisions_total``.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from prometheus_client import Counter
+
+db_routing_decisions_total = Counter(
+    "db_routing_decisions_total",
+    "Database routing decisions, by operation, chosen database and reason",
+    ["operation", "database", "reason"],
+)
+
+
+class Routing:
+    """Where the current request may read from."""
+
+    __slots__ = ("pinned", "replica", "wrote")
+
+    def __init__(self, pinned):
+        # Set for visitors holding the sticky cookie
+        self.pinned = pinned
+        # Set by ReplicaReadMixin for the request's replica-safe reads
+        self.replica = None
+        self.wrote = False
+
+
+current = ContextVar("db_routing", default=None)
+
+
+class ReplicaReadMixin:
+    """Let GET and HEAD requests to this view read from a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        routing = current.get()
+        if routing is not None and request.method in ("GET", "HEAD"):
+            routing.replica = random.choice(settings.READ_REPLICAS)
+        return super().dispatch(request, *args, **kwargs)
+
+
+def route_read():
+    """The database for a read in this context, and why."""
+    routing = current.get()
+    if routing is None or routing.replica is None:
+        return DEFAULT_DB_ALIAS, "primary_view"
+    if routing.pinned:
+        return DEFAULT_DB_ALIAS, "sticky"
+    if routing.wrote:
+        return DEFAULT_DB_ALIAS, "read_after_write"
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS, "transaction"
+    return routing.replica, "replica"
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        database, reason = route_read()
+        db_routing_decisions_total.labels("read", database, reason).inc()
+        return database
+
+    def db_for_write(self, model, **hints):
+        routing = current.get()
+        if routing is not None:
+            routing.wrote = True
+        db_routing_decisions_total.labels("write", DEFAULT_DB_ALIAS, "write").inc()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's data, so objects from any of them relate
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 import environ
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,6 +40,8 @@ ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["*"])
 # Application definition
 
 INSTALLED_APPS = [
+    # Must come first so runserver is served by daphne (ASGI + WebSockets)
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -51,6 +54,7 @@ INSTALLED_APPS = [
     "django_extensions",
     "drf_spectacular",
     "django_prometheus",
+    "channels",
     # Local apps
     "users.apps.UsersConfig",
     "polls.apps.PollsConfig",
@@ -58,8 +62,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "voting_project.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "voting_project.middleware.WhiteNoiseMiddleware",
+    "voting_project.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -72,22 +78,57 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "voting_project.urls"
 
+# Templates are parsed once per process and kept by the cached loader, whatever
+# DEBUG says. Set TEMPLATE_CACHE=False to re-read them on every render while
+# editing templates outside runserver (which reloads them on its own).
+TEMPLATE_CACHE = env.bool("TEMPLATE_CACHE", default=True)
+# Compile the project's templates when a worker starts, not on first request
+TEMPLATE_WARMUP = env.bool("TEMPLATE_WARMUP", default=TEMPLATE_CACHE)
+# "jinja2" renders the poll list, detail and results pages from jinja2/
+TEMPLATE_ENGINE = env.str("TEMPLATE_ENGINE", default="django")
+
+TEMPLATE_CONTEXT_PROCESSORS = [
+    "django.template.context_processors.request",
+    "django.contrib.auth.context_processors.auth",
+    "django.contrib.messages.context_processors.messages",
+]
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
         "OPTIONS": {
-            "context_processors": [
-                "django.template.context_processors.request",
-                "django.contrib.auth.context_processors.auth",
-                "django.contrib.messages.context_processors.messages",
-            ],
+            "context_processors": TEMPLATE_CONTEXT_PROCESSORS,
+            "loaders": TEMPLATE_LOADERS,
         },
     },
 ]
+if TEMPLATE_ENGINE == "jinja2":
+    # Listed first so its templates win; anything missing from jinja2/ (forms,
+    # users pages) still comes from the Django engine
+    TEMPLATES.insert(
+        0,
+        {
+            "BACKEND": "django.template.backends.jinja2.Jinja2",
+            "DIRS": [BASE_DIR / "jinja2"],
+            "OPTIONS": {
+                "environment": "voting_project.rendering.environment",
+                "context_processors": TEMPLATE_CONTEXT_PROCESSORS,
+                # Compiled templates are only re-checked against their files
+                # when TEMPLATE_CACHE is off
+                "auto_reload": not TEMPLATE_CACHE,
+            },
+        },
+    )
 
 WSGI_APPLICATION = "voting_project.wsgi.application"
+ASGI_APPLICATION = "voting_project.asgi.application"
 
 
 # Database
@@ -97,6 +138,157 @@ DATABASES = {
     "default": env.db(),
 }
 
+# Read replicas, as comma-separated database URLs; they become the aliases
+# replica1, replica2, ... Only the poll list, detail and results pages read
+# from them (see voting_project.replicas). Migrations run on the primary only.
+REPLICA_DATABASE_URLS = env.list("REPLICA_DATABASE_URLS", default=[])
+for number, url in enumerate(REPLICA_DATABASE_URLS, 1):
+    DATABASES[f"replica{number}"] = {
+        **env.db_url_config(url),
+        "TEST": {"MIRROR": "default"},
+    }
+READ_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+# After writing, a visitor reads from the primary for this long, which must
+# cover the replicas' lag, so they see their own vote
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=10)
+REPLICA_STICKY_COOKIE = "db_primary"
+DATABASE_ROUTERS = ["voting_project.replicas.ReplicaRouter"] if READ_REPLICAS else []
+
+# How each process holds its database connections (DB_CONNECTION_MODE):
+#   per-request  connect and disconnect around every request
+#   persistent   keep each thread's connection for DB_CONN_MAX_AGE seconds
+#   pool         a psycopg 3 pool per process (PostgreSQL only)
+#   pgbouncer    persistent connections to a transaction-pooling pgbouncer,
+#                which cannot hold server-side cursors across transactions
+# Reused connections are health-checked first. Under ASGI (uvicorn workers)
+# every request runs in a new thread, so thread-bound persistent connections
+# would pile up: the default there is the pool, or per-request off Postgres.
+POSTGRES_ENGINE = "django.db.backends.postgresql"
+GUNICORN_WORKER_CLASS = env.str("GUNICORN_WORKER_CLASS", default="gthread")
+if GUNICORN_WORKER_CLASS != "uvicorn":
+    default_mode = "persistent"
+elif DATABASES["default"]["ENGINE"] == POSTGRES_ENGINE:
+    default_mode = "pool"
+else:
+    default_mode = "per-request"
+DB_CONNECTION_MODE = env.str("DB_CONNECTION_MODE", default=default_mode)
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=60)
+
+# Pool bounds per process. A gthread worker needs at most one connection per
+# thread; async workers run each request's queries in its own thread, so they
+# get the pod's whole share. DB_CONNECTIONS_PER_POD is split across workers so
+# that replicas x DB_CONNECTIONS_PER_POD stays under Postgres max_connections.
+DB_CONNECTIONS_PER_POD = env.int("DB_CONNECTIONS_PER_POD", default=20)
+worker_share = max(1, DB_CONNECTIONS_PER_POD // env.int("GUNICORN_WORKERS", default=1))
+if GUNICORN_WORKER_CLASS == "uvicorn":
+    default_pool_size = worker_share
+else:
+    default_pool_size = min(env.int("GUNICORN_THREADS", default=4), worker_share)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=default_pool_size)
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=min(2, DB_POOL_MAX_SIZE))
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", default=10.0)
+
+if DB_CONNECTION_MODE not in ("per-request", "persistent", "pool", "pgbouncer"):
+    raise ImproperlyConfigured(
+        "DB_CONNECTION_MODE must be per-request, persistent, pool or pgbouncer, "
+        f"not {DB_CONNECTION_MODE!r}."
+    )
+# The primary and every replica connect the same way, each with its own pool
+for database in DATABASES.values():
+    if DB_CONNECTION_MODE in ("pool", "pgbouncer") and (
+        database["ENGINE"] != POSTGRES_ENGINE
+    ):
+        raise ImproperlyConfigured(
+            f"DB_CONNECTION_MODE={DB_CONNECTION_MODE} needs PostgreSQL database "
+            "URLs."
+        )
+    if DB_CONNECTION_MODE == "per-request":
+        database["CONN_MAX_AGE"] = 0
+    elif DB_CONNECTION_MODE in ("persistent", "pgbouncer"):
+        database["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+        database["CONN_HEALTH_CHECKS"] = True
+        if DB_CONNECTION_MODE == "pgbouncer":
+            database["DISABLE_SERVER_SIDE_CURSORS"] = True
+    else:
+        database["CONN_MAX_AGE"] = 0
+        database["CONN_HEALTH_CHECKS"] = True
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+# Sessions (SESSION_BACKEND): "db"; "cached_db", written to the database but
+# read from the cache; "cache", never in the database; or "signed_cookies",
+# kept in the client's cookie, which cannot be revoked from the server before
+# it expires. The cache-backed ones need a cache shared by every process (a
+# CACHE_URL), or a logout in one worker goes unseen by the others.
+SESSION_BACKENDS = ("db", "cached_db", "cache", "signed_cookies")
+SESSION_BACKEND = env.str(
+    "SESSION_BACKEND",
+    default="db" if "LocMemCache" in CACHES["default"]["BACKEND"] else "cached_db",
+)
+if SESSION_BACKEND not in SESSION_BACKENDS:
+    raise ImproperlyConfigured(
+        f"SESSION_BACKEND must be one of {', '.join(SESSION_BACKENDS)}, "
+        f"not {SESSION_BACKEND!r}."
+    )
+SESSION_ENGINE = f"django.contrib.sessions.backends.{SESSION_BACKEND}"
+# Flash messages live only in a cookie, so a vote's "Vote recorded" never
+# reads or writes a session, and anonymous visitors never get one
+MESSAGE_STORAGE = "django.contrib.messages.storage.cookie.CookieStorage"
+
+# Poll results are cached per version; the stale window covers recomputes
+RESULTS_CACHE_TIMEOUT = env.int("RESULTS_CACHE_TIMEOUT", default=300)
+RESULTS_CACHE_STALE_SECONDS = env.int("RESULTS_CACHE_STALE_SECONDS", default=10)
+# Anonymous list/detail/results pages and the detail page's choices fragment
+PAGE_CACHE_TIMEOUT = env.int("PAGE_CACHE_TIMEOUT", default=60)
+
+# Stage histograms and per-request query counts: "full" or "minimal". Switch
+# at runtime with `manage.py instrumentation`; processes re-read it every TTL.
+INSTRUMENTATION_MODE = env.str("INSTRUMENTATION_MODE", default="full")
+INSTRUMENTATION_MODE_TTL = env.float("INSTRUMENTATION_MODE_TTL", default=5.0)
+
+# Most SQL queries a request to each view may run, including the session and
+# user lookups for signed-in users. Over budget: "warn" logs, "raise" fails.
+QUERY_BUDGETS = {
+    "polls:poll_list": 4,
+    "polls:poll_detail": 4,
+    "polls:poll_results": 4,
+    "polls:poll_vote": 6,
+    "api:poll_list": 3,
+    "api:poll_detail": 4,
+    "api:poll_results": 5,
+    "api:poll_vote": 5,
+}
+QUERY_BUDGET_MODE = env.str("QUERY_BUDGET_MODE", default="warn")
+# X-DB-Queries / X-DB-Time-Ms response headers
+QUERY_STATS_HEADERS = env.bool("QUERY_STATS_HEADERS", default=DEBUG)
+QUERY_LOG_LEVEL = env.str("QUERY_LOG_LEVEL", default="WARNING")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "voting_project.queries": {
+            "handlers": ["console"],
+            "level": QUERY_LOG_LEVEL,
+            "propagate": False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -153,6 +345,14 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Serve the poll list, detail and results pages from async views. Turn on
+# when running the ASGI app under uvicorn workers; under WSGI each async view
+# would run in its own event loop.
+ASYNC_READ_VIEWS = env.bool("ASYNC_READ_VIEWS", default=False)
+
+# Poll list pagination: "offset" (numbered pages) or "cursor" (keyset, no COUNT)
+POLL_LIST_PAGINATION = env("POLL_LIST_PAGINATION", default="offset")
+
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -163,6 +363,15 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": (
+        "rest_framework.throttling.AnonRateThrottle",
+        "rest_framework.throttling.UserRateThrottle",
+    ),
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": env("API_THROTTLE_ANON", default="120/min"),
+        "user": env("API_THROTTLE_USER", default="600/min"),
+        "votes": env("API_THROTTLE_VOTES", default="30/min"),
+    },
 }
 
 SPECTACULAR_SETTINGS = {
@@ -174,3 +383,59 @@ SPECTACULAR_SETTINGS = {
 
 # Email settings (Console backend for testing)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+# Redis / Celery
+REDIS_URL = env("REDIS_URL", default="redis://localhost:6379/1")
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://localhost:6379/0")
+CELERY_TASK_IGNORE_RESULT = True
+
+# Write-behind voting: accept votes into Redis and bulk-flush them to Postgres
+VOTE_WRITE_BEHIND = env.bool("VOTE_WRITE_BEHIND", default=False)
+VOTE_COUNTER_SHARDS = env.int("VOTE_COUNTER_SHARDS", default=8)
+VOTE_FLUSH_BATCH_SIZE = env.int("VOTE_FLUSH_BATCH_SIZE", default=500)
+VOTE_FLUSH_INTERVAL = env.float("VOTE_FLUSH_INTERVAL", default=1.0)
+
+# Anonymous voters: a per-poll Bloom filter of voter IPs (polls.voter_filter)
+# lets repeat votes be refused without an insert attempt
+VOTER_FILTER = env.bool("VOTER_FILTER", default=True)
+VOTER_FILTER_CAPACITY = env.int("VOTER_FILTER_CAPACITY", default=100_000)
+VOTER_FILTER_ERROR_RATE = env.float("VOTER_FILTER_ERROR_RATE", default=0.01)
+VOTER_FILTER_TTL = env.int("VOTER_FILTER_TTL", default=30 * 24 * 3600)
+
+# Archived polls: tallies frozen into PollSummary, votes moved to the archive
+# partitions (polls.archive) every interval, a batch per transaction
+VOTE_ARCHIVE_INTERVAL = env.float("VOTE_ARCHIVE_INTERVAL", default=3600.0)
+VOTE_ARCHIVE_BATCH_SIZE = env.int("VOTE_ARCHIVE_BATCH_SIZE", default=5000)
+
+# Approximate unique voters and IPs per poll and category, in Redis
+# HyperLogLogs (polls.reach); category gauges are recomputed at most this often
+REACH_ANALYTICS = env.bool("REACH_ANALYTICS", default=True)
+REACH_METRICS_TTL = env.int("REACH_METRICS_TTL", default=60)
+
+# Open polls at start_date and close them at end_date, this often
+POLL_LIFECYCLE_INTERVAL = env.float("POLL_LIFECYCLE_INTERVAL", default=60.0)
+
+# Real-time results over WebSockets
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": [env("CHANNEL_LAYER_URL", default=REDIS_URL)]},
+    },
+}
+# Watchers get at most one tally update per poll per interval
+RESULTS_BROADCAST_INTERVAL_MS = env.int("RESULTS_BROADCAST_INTERVAL_MS", default=500)
+
+CELERY_BEAT_SCHEDULE = {
+    "flush-vote-stream": {
+        "task": "polls.tasks.flush_vote_stream",
+        "schedule": VOTE_FLUSH_INTERVAL,
+    },
+    "poll-lifecycle": {
+        "task": "polls.tasks.run_poll_lifecycle",
+        "schedule": POLL_LIFECYCLE_INTERVAL,
+    },
+    "archive-polls": {
+        "task": "polls.tasks.archive_polls",
+        "schedule": VOTE_ARCHIVE_INTERVAL,
+    },
+}
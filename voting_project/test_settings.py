@@ -0,0 +1,14 @@
+"""
+Settings for the test suite (``pytest``): the project settings, with defaults
+for what a .env file would otherwise have to provide. Set DATABASE_URL to a
+PostgreSQL database to run the PostgreSQL-only tests too.
+"""
+
+import os
+
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+# Over-budget views fail the test that requested them
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+from .settings import *  # noqa: E402,F401,F403
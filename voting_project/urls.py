@@ -15,6 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+import os
+
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
@@ -24,16 +26,40 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 from django.http import HttpResponse
+from django_prometheus.exports import ExportToDjangoView
+from polls.reach import CategoryReachCollector
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    generate_latest,
+    multiprocess,
+)
 
 
 def health_check(request):
     return HttpResponse("OK")
 
 
+def metrics(request):
+    """
+    django_prometheus's export view. Under gunicorn's multiprocess metrics it
+    only reads the workers' files, so collectors computed at scrape time are
+    added to that registry here.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return ExportToDjangoView(request)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    if settings.REACH_ANALYTICS:
+        registry.register(CategoryReachCollector())
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("users/", include("users.urls")),
     # API endpoints
+    path("api/v1/", include("polls.api_urls")),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path(
         "api/docs/",
@@ -41,7 +67,7 @@ urlpatterns = [
         name="swagger-ui",
     ),
     # Prometheus metrics
-    path("", include("django_prometheus.urls")),
+    path("metrics", metrics, name="prometheus-django-metrics"),
     # Health check
     path("health/", health_check, name="health_check"),
     # Polls app (Put last because it matches slugs)
@@ -1,7 +1,21 @@
 import random
 import string
+from collections import OrderedDict
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
 from django.utils.text import slugify
 
+# Suffix appended when a slug is taken: 36**6 values, so retries are rare
+SLUG_SUFFIX_LENGTH = 6
+SLUG_ATTEMPTS = 5
+# Bare slugs this process has seen taken, e.g. popular titles, so later saves
+# skip straight to a suffixed slug instead of hitting the constraint first.
+TAKEN_SLUGS_MAX = 10_000
+_taken_slugs = OrderedDict()
+
 
 def generate_unique_slug(model_instance, title, slug_field_name="slug"):
     slug = slugify(title)
@@ -23,5 +37,60 @@ def generate_unique_slug(model_instance, title, slug_field_name="slug"):
         extension = f"-{random_string(4)}"
 
 
+def save_with_unique_slug(
+    model_instance, title, save, *args, slug_field_name="slug", **kwargs
+):
+    """
+    Fill in the slug from `title` and save through `save(*args, **kwargs)`.
+
+    The unique constraint on the slug column does the checking: each attempt
+    is a plain INSERT and a clash is retried with a random suffix. The bare
+    slug is skipped once this process has seen it taken. A new object costs
+    one round trip instead of an exists() query per candidate, and concurrent
+    saves cannot both pass a check and then collide.
+    """
+    model_class = model_instance.__class__
+    max_length = model_class._meta.get_field(slug_field_name).max_length
+    base = slugify(title)[: max_length - SLUG_SUFFIX_LENGTH - 1].rstrip("-")
+    using = kwargs.get("using") or router.db_for_write(
+        model_class, instance=model_instance
+    )
+
+    taken_key = (model_class._meta.label, base)
+    slug = base
+    if taken_key in _taken_slugs:
+        _taken_slugs.move_to_end(taken_key)
+        slug = f"{base}-{random_string(SLUG_SUFFIX_LENGTH)}"
+
+    for _ in range(SLUG_ATTEMPTS):
+        setattr(model_instance, slug_field_name, slug)
+        try:
+            if transaction.get_connection(using).in_atomic_block:
+                # A failed INSERT would abort the surrounding transaction
+                with transaction.atomic(using=using):
+                    save(*args, **kwargs)
+            else:
+                save(*args, **kwargs)
+            return
+        except IntegrityError:
+            clash = model_class._default_manager.using(using).filter(
+                **{slug_field_name: slug}
+            )
+            if not clash.exists():
+                raise
+            if slug == base:
+                _taken_slugs[taken_key] = True
+                if len(_taken_slugs) > TAKEN_SLUGS_MAX:
+                    _taken_slugs.popitem(last=False)
+        slug = f"{base}-{random_string(SLUG_SUFFIX_LENGTH)}"
+    raise IntegrityError(f"Could not allocate a unique slug for {title!r}.")
+
+
 def random_string(length=4):
     return "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """Shared Redis client for counters, streams and pub/sub helpers."""
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voting_project.settings")
 
 application = get_wsgi_application()
+
+from voting_project.rendering import warm_templates  # noqa: E402
+
+# Each worker imports this module once, so its template cache starts full
+if settings.TEMPLATE_WARMUP:
+    warm_templates()